@@ -0,0 +1,61 @@
+import argparse
+
+import torch
+
+from benchmarks.common import measure, random_input, max_abs_diff, write_json
+from services.inference import get_model, predict_torch, bf16_supported, to_bfloat16
+
+
+def resident_mb(model):
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors) / 2**20
+
+
+def activation_mb(model, x):
+    # Size of the largest intermediate: the (B, T, N, H) graph-conv embedding.
+    with torch.no_grad():
+        emb = model.embed(x)
+    return emb.numel() * emb.element_size() / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency, memory and accuracy of bfloat16 vs fp32 TGCN on CPU.")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 256])
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    if not bf16_supported():
+        print("Warning: this CPU has no native bfloat16 support; bf16 timings will be emulated")
+
+    fp32 = get_model(backend="torch", quantize=False, precision="fp32")
+    # Converted directly rather than through get_model so the benchmark runs
+    # even where the load-time accuracy guard or CPU check would refuse it.
+    bf16 = to_bfloat16(get_model(backend="torch", quantize=False, precision="fp32"))
+
+    results = {"resident_mb": {"fp32": resident_mb(fp32), "bf16": resident_mb(bf16)}, "batches": {}}
+    print(f"Resident weights: fp32 {results['resident_mb']['fp32']:.3f} MB, bf16 {results['resident_mb']['bf16']:.3f} MB")
+
+    print(f"\n{'batch':>6} {'fp32 p50':>10} {'bf16 p50':>10} {'autocast p50':>13} {'act MB fp32/bf16':>17} {'max abs diff':>13}")
+    for batch_size in args.batch_sizes:
+        x = random_input(batch_size)
+        row = {
+            "fp32": measure(lambda: predict_torch(x, fp32), repeat=args.repeat, warmup=10),
+            "bf16": measure(lambda: predict_torch(x, bf16), repeat=args.repeat, warmup=10),
+            "autocast": measure(lambda: predict_torch(x, fp32, precision="bf16"), repeat=args.repeat, warmup=10),
+            "activation_mb": {"fp32": activation_mb(fp32, x), "bf16": activation_mb(bf16, x)},
+            "max_abs_diff": max_abs_diff(predict_torch(x, bf16), predict_torch(x, fp32)),
+        }
+        results["batches"][batch_size] = row
+        print(
+            f"{batch_size:>6} {row['fp32']['p50_ms']:>8.3f}ms {row['bf16']['p50_ms']:>8.3f}ms "
+            f"{row['autocast']['p50_ms']:>11.3f}ms {row['activation_mb']['fp32']:>8.2f}/{row['activation_mb']['bf16']:<8.2f}"
+            f"{row['max_abs_diff']:>13.2e}"
+        )
+
+    if args.json:
+        write_json(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
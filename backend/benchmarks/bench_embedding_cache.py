@@ -0,0 +1,54 @@
+import argparse
+
+import pandas as pd
+import torch
+
+from benchmarks.common import measure, random_input, write_json
+from services.inference import get_model, SEQ_LEN
+from services.preprocessing import rollout
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Autoregressive rollout cost with and without the embedding cache.")
+    parser.add_argument("--steps", type=int, default=6)
+    parser.add_argument("--hours", type=int, default=24, help="consecutive hourly requests to simulate")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    model = get_model(backend="torch")
+    cache = model.embedding_cache
+
+    # A sliding history: request h sees hours [h, h + SEQ_LEN).
+    history = random_input(1, seq_len=SEQ_LEN + args.hours)
+    times = pd.date_range("2025-12-15 00:00", periods=SEQ_LEN + args.hours, freq="h")
+
+    def run(use_cache):
+        outputs = []
+        for h in range(args.hours):
+            x = history[:, h:h + SEQ_LEN]
+            outputs.append(rollout(model, x, times[h:h + SEQ_LEN], args.steps, use_cache=use_cache)[0])
+        return outputs
+
+    cache.clear()
+    expected = run(False)
+    actual = run(True)
+    identical = all(torch.equal(a, b) for exp, act in zip(expected, actual) for a, b in zip(exp, act))
+    max_diff = max(float((a - b).abs().max()) for exp, act in zip(expected, actual) for a, b in zip(exp, act))
+    print(f"Cached rollout bit-identical: {identical} (max abs diff {max_diff:.2e})")
+    print(f"Cache hits {cache.hits}, misses {cache.misses}, resident entries {len(cache)}")
+
+    uncached = measure(lambda: run(False), repeat=args.repeat, warmup=2)
+    # Start every timed pass cold so only reuse within the simulated day counts.
+    cached = measure(lambda: (cache.clear(), run(True)), repeat=args.repeat, warmup=2)
+    speedup = uncached["p50_ms"] / cached["p50_ms"]
+    per_request = args.hours
+    print(f"uncached: {uncached['p50_ms'] / per_request:.3f}ms per request")
+    print(f"cached:   {cached['p50_ms'] / per_request:.3f}ms per request ({speedup:.2f}x)")
+
+    if args.json:
+        write_json({"bit_identical": identical, "max_abs_diff": max_diff, "uncached": uncached, "cached": cached, "speedup": speedup}, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+
+import torch
+
+from benchmarks.common import measure, random_input, write_json
+from benchmarks.bench_sparse import random_graph
+from services.inference import TGCN, get_model, predict_torch, NUM_NODES, NUM_FEATURES, TARGET_DIM, SEQ_LEN
+
+# Reproducible sweep over the TGCN inference path. Every case reports latency
+# percentiles, throughput and peak RSS, and can be compared with a stored
+# baseline so inference regressions fail before they ship. Each case runs in
+# its own subprocess by default, because ru_maxrss only ever grows within a
+# process.
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Serving knobs that would otherwise leak into the fp32 eager baseline.
+PINNED_ENV = ("INFERENCE_BACKEND", "INFERENCE_PRECISION", "INFERENCE_QUANTIZE", "INFERENCE_THREADS")
+
+DEFAULT_SWEEP = {
+    "batch_size": [1, 8, 64, 256],
+    "seq_len": [SEQ_LEN],
+    "num_nodes": [NUM_NODES],
+    "hidden_dim": [128],
+    "threads": [1, 4],
+}
+
+QUICK_SWEEP = {
+    "batch_size": [1, 64],
+    "seq_len": [SEQ_LEN],
+    "num_nodes": [NUM_NODES],
+    "hidden_dim": [128],
+    "threads": [1],
+}
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def build_model(num_nodes, hidden_dim):
+    if num_nodes == NUM_NODES and hidden_dim == 128:
+        return get_model(backend="torch", quantize=False, precision="fp32")
+    torch.manual_seed(0)
+    adj = random_graph(num_nodes, min(8, num_nodes - 1)).to_dense()
+    return TGCN(num_nodes, NUM_FEATURES, hidden_dim, TARGET_DIM, adj, 0.1).eval()
+
+
+def case_key(case):
+    return "bs{batch_size}-T{seq_len}-N{num_nodes}-H{hidden_dim}-t{threads}".format(**case)
+
+
+def run_case(case, repeat, warmup, target, model=None):
+    if model is None:
+        model = build_model(case["num_nodes"], case["hidden_dim"])
+    torch.set_num_threads(case["threads"])
+
+    x = random_input(case["batch_size"], case["seq_len"], case["num_nodes"])
+    if target == "forward":
+        def fn():
+            with torch.no_grad():
+                model(x)
+    else:
+        def fn():
+            predict_torch(x, model)
+
+    loaded_rss = peak_rss_mb()
+    stats = measure(fn, repeat=repeat, warmup=warmup)
+    stats["windows_per_second"] = case["batch_size"] * 1000.0 / stats["mean_ms"]
+    stats["peak_rss_mb"] = peak_rss_mb()
+    # Growth of the high-water mark over model + input alone: the case's
+    # activation and workspace footprint.
+    stats["peak_rss_delta_mb"] = stats["peak_rss_mb"] - loaded_rss
+    return stats
+
+
+def run_case_isolated(case, repeat, warmup, target):
+    command = [
+        sys.executable, "-m", "benchmarks.bench_forward",
+        "--single-case", json.dumps(case),
+        "--target", target, "--repeat", str(repeat), "--warmup", str(warmup),
+    ]
+    output = subprocess.run(command, cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_sweep(sweep, repeat, warmup, target, isolate=True):
+    results = {}
+    models = {}
+    for values in itertools.product(*sweep.values()):
+        case = dict(zip(sweep.keys(), values))
+
+        if isolate:
+            stats = run_case_isolated(case, repeat, warmup, target)
+        else:
+            model_key = (case["num_nodes"], case["hidden_dim"])
+            if model_key not in models:
+                models[model_key] = build_model(*model_key)
+            stats = run_case(case, repeat, warmup, target, models[model_key])
+        results[case_key(case)] = {**case, **stats}
+        print(
+            f"{case_key(case):>28} p50 {stats['p50_ms']:>9.3f}ms p99 {stats['p99_ms']:>9.3f}ms "
+            f"{stats['windows_per_second']:>10.0f} win/s rss {stats['peak_rss_mb']:>7.1f}MB"
+        )
+    return results
+
+
+def compare(results, baseline, tolerance, metric):
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        ratio = current[metric] / previous[metric]
+        status = "REGRESSION" if ratio > 1 + tolerance else "ok"
+        print(f"{key:>28} {previous[metric]:>9.3f} -> {current[metric]:>9.3f} ({ratio:>5.2f}x) {status}")
+        if status != "ok":
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TGCN forward / predict_torch micro-benchmark suite.")
+    parser.add_argument("--target", choices=["forward", "predict_torch"], default="predict_torch")
+    parser.add_argument("--batch-sizes", type=int, nargs="+")
+    parser.add_argument("--seq-lens", type=int, nargs="+")
+    parser.add_argument("--nodes", type=int, nargs="+")
+    parser.add_argument("--hidden-dims", type=int, nargs="+")
+    parser.add_argument("--threads", type=int, nargs="+")
+    parser.add_argument("--quick", action="store_true", help="small sweep for CI")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="write results here")
+    parser.add_argument("--baseline", default=None, help="results JSON from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown before a case is a regression")
+    parser.add_argument("--metric", default="p50_ms")
+    parser.add_argument("--no-isolate", action="store_true",
+                        help="run every case in this process (faster; peak RSS becomes a running maximum)")
+    parser.add_argument("--single-case", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    for var in PINNED_ENV:
+        os.environ.pop(var, None)
+    torch.manual_seed(args.seed)
+
+    if args.single_case:
+        print(json.dumps(run_case(json.loads(args.single_case), args.repeat, args.warmup, args.target)))
+        return
+
+    sweep = dict(QUICK_SWEEP if args.quick else DEFAULT_SWEEP)
+    for key, override in (
+        ("batch_size", args.batch_sizes),
+        ("seq_len", args.seq_lens),
+        ("num_nodes", args.nodes),
+        ("hidden_dim", args.hidden_dims),
+        ("threads", args.threads),
+    ):
+        if override:
+            sweep[key] = override
+
+    results = run_sweep(sweep, args.repeat, args.warmup, args.target, isolate=not args.no_isolate)
+    report = {
+        "meta": {
+            "target": args.target,
+            "torch": torch.__version__,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "repeat": args.repeat,
+            "isolated": not args.no_isolate,
+        },
+        "results": results,
+    }
+
+    if args.json:
+        write_json(report, args.json)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        print(f"\nCompared with {args.baseline} on {args.metric} (tolerance {args.tolerance:.0%})")
+        regressions = compare(results, baseline, args.tolerance, args.metric)
+        if regressions:
+            print(f"{len(regressions)} case(s) regressed")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
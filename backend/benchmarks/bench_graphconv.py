@@ -0,0 +1,85 @@
+import argparse
+
+import torch
+
+from benchmarks.common import measure, random_input, max_abs_diff, write_json
+from services.inference import get_model
+
+BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512]
+
+
+def legacy_forward(model, x):
+    # The original TGCN.forward: one GraphConv call per timestep, each of
+    # which repeats the adjacency matrix across the batch.
+    B, T, N, F = x.shape
+    adj = model.gc1.adj
+    out = []
+    for t in range(T):
+        xt = x[:, t, :, :]
+        xt = torch.bmm(adj.unsqueeze(0).repeat(xt.size(0), 1, 1), xt)
+        xt = torch.relu(model.gc1.fc(xt))
+        out.append(xt)
+    out = torch.stack(out, dim=1)
+    out = out.transpose(1, 2)
+    out = out.reshape(B * N, T, -1)
+    out, _ = model.gru(out)
+    out = out[:, -1, :]
+    out = model.dropout(out)
+    out = model.fc(out)
+    return out.view(B, N, -1)
+
+
+def check_equivalence(model, batch_sizes, atol):
+    for batch_size in batch_sizes:
+        x = random_input(batch_size, seed=batch_size)
+        with torch.no_grad():
+            expected = legacy_forward(model, x)
+            model.fused = True
+            fused = model(x)
+            model.fused = False
+            looped = model(x)
+            model.fused = True
+
+        fused_diff = max_abs_diff(fused, expected)
+        looped_diff = max_abs_diff(looped, expected)
+        if fused_diff > atol or looped_diff > atol:
+            raise AssertionError(
+                f"B={batch_size}: fused diff {fused_diff:.2e}, per-step diff {looped_diff:.2e} exceed {atol:.0e}"
+            )
+        print(f"B={batch_size:4d} equivalent (fused {fused_diff:.2e}, per-step {looped_diff:.2e})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Before/after latency of the TGCN graph convolution.")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=BATCH_SIZES)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--atol", type=float, default=1e-5)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    model = get_model(backend="torch")
+    model.eval()
+
+    check_equivalence(model, args.batch_sizes, args.atol)
+
+    results = []
+    print(f"\n{'batch':>6} {'before p50':>12} {'after p50':>12} {'speedup':>8}")
+    with torch.no_grad():
+        for batch_size in args.batch_sizes:
+            x = random_input(batch_size)
+            before = measure(lambda: legacy_forward(model, x), repeat=args.repeat)
+            after = measure(lambda: model(x), repeat=args.repeat)
+            speedup = before["p50_ms"] / after["p50_ms"]
+            results.append({"batch_size": batch_size, "before": before, "after": after, "speedup": speedup})
+            print(f"{batch_size:>6} {before['p50_ms']:>10.3f}ms {after['p50_ms']:>10.3f}ms {speedup:>7.2f}x")
+
+    if args.json:
+        write_json(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
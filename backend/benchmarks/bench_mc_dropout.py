@@ -0,0 +1,41 @@
+import argparse
+
+import pandas as pd
+
+from benchmarks.common import measure, random_input, write_json
+from services.inference import get_model
+from services.preprocessing import predict_multistep
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of /api/forecasts with K Monte-Carlo dropout trajectories vs the point rollout.")
+    parser.add_argument("--samples", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--steps", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    model = get_model(backend="torch")
+    model.eval()
+    # The same (window, timestamps) pair the serving path passes in, so the
+    # embedding cache behaves as it does between requests.
+    features = (random_input(1), pd.date_range("2024-03-01", periods=24, freq="h"))
+
+    def forecast(k):
+        return predict_multistep(model, steps=args.steps, samples=k, features=features)
+
+    point = measure(lambda: forecast(0), repeat=args.repeat, warmup=5)
+    results = {"point": point, "samples": []}
+    print(f"point rollout: {point['p50_ms']:.3f}ms")
+    print(f"\n{'K':>5} {'p50':>12} {'p99':>12} {'vs point':>9}")
+    for k in args.samples:
+        sampled = measure(lambda: forecast(k), repeat=args.repeat, warmup=5)
+        results["samples"].append({"k": k, "forecast": sampled})
+        print(f"{k:>5} {sampled['p50_ms']:>10.3f}ms {sampled['p99_ms']:>10.3f}ms {sampled['p50_ms'] / point['p50_ms']:>8.2f}x")
+
+    if args.json:
+        write_json(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
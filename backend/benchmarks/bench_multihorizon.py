@@ -0,0 +1,84 @@
+import argparse
+
+import numpy as np
+import torch
+
+from benchmarks.common import measure, random_input, write_json
+from services.history import load_history, scale_block, descale_block, forecast_windows
+from services.inference import get_model
+from services.preprocessing import get_scaler_bank, rollout_batch, TARGET_COLS
+
+
+def predict_windows(fn, windows, future_time, batch_size):
+    outputs = []
+    for start in range(0, len(windows), batch_size):
+        x = torch.from_numpy(np.ascontiguousarray(windows[start:start + batch_size]))
+        t = torch.from_numpy(np.ascontiguousarray(future_time[start:start + batch_size])).float()
+        # (B, N, steps, targets) -> (B, steps, N, targets) so stations sit next to targets
+        outputs.append(fn(x, t).transpose(1, 2).numpy())
+    return np.concatenate(outputs, axis=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Direct multi-horizon head vs autoregressive rollout.")
+    parser.add_argument("--history", "--csv", dest="history", required=True, help="hourly history in the aqi_data.csv schema")
+    parser.add_argument("--direct", required=True, help="checkpoint from scripts/train_multihorizon.py")
+    parser.add_argument("--steps", type=int, default=6)
+    parser.add_argument("--test-split", type=float, default=0.1, help="score only the most recent fraction of windows")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    autoregressive = get_model(backend="torch", quantize=False)
+    direct = get_model(backend="torch", quantize=False, weights_path=args.direct)
+    if direct.horizons < args.steps:
+        raise ValueError(f"Direct checkpoint has {direct.horizons} horizons; {args.steps} requested.")
+
+    methods = {
+        "autoregressive": lambda x, t: rollout_batch(autoregressive, x, t),
+        "direct": lambda x, t: direct.forward_horizons(x)[:, :, :t.size(1)],
+    }
+
+    scalers = get_scaler_bank()
+    times, raw = load_history(args.history)
+    block = scale_block(times, raw, scalers)
+    windows, _, future_time = forecast_windows(times, block, args.steps)
+    first = int(len(windows) * (1 - args.test_split))
+    windows, future_time = windows[first:], future_time[first:]
+    # Ground truth in real units for the same windows: (W, steps, N, targets)
+    truth = np.stack([raw[24 + first + h:24 + first + h + len(windows)] for h in range(args.steps)], axis=1)
+
+    report = {"windows": len(windows), "latency": {}, "accuracy": {}}
+    print(f"Scoring {len(windows)} windows")
+    with torch.no_grad():
+        x1 = random_input(1)
+        t1 = torch.from_numpy(np.ascontiguousarray(future_time[:1])).float()
+        for name, fn in methods.items():
+            report["latency"][name] = measure(lambda: fn(x1, t1), repeat=args.repeat, warmup=5)
+            pred = descale_block(predict_windows(fn, windows, future_time, args.batch_size), scalers)
+            err = pred - truth
+            report["accuracy"][name] = {
+                feat: {
+                    "mae": np.abs(err[..., i]).mean(axis=(0, 2)).tolist(),
+                    "rmse": np.sqrt((err[..., i] ** 2).mean(axis=(0, 2))).tolist(),
+                }
+                for i, feat in enumerate(TARGET_COLS)
+            }
+
+    for name in methods:
+        print(f"{name:>15} B=1 p50 {report['latency'][name]['p50_ms']:.3f}ms p99 {report['latency'][name]['p99_ms']:.3f}ms")
+
+    header = " ".join(f"{h + 1:>2}h AR/direct" for h in range(args.steps))
+    print(f"\nMAE by horizon\n{'pollutant':>9} {header}")
+    for feat in TARGET_COLS:
+        ar = report["accuracy"]["autoregressive"][feat]["mae"]
+        dr = report["accuracy"]["direct"][feat]["mae"]
+        print(f"{feat:>9} " + " ".join(f"{a:>6.2f}/{d:<6.2f}" for a, d in zip(ar, dr)))
+
+    if args.json:
+        write_json(report, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import argparse
+
+import numpy as np
+
+from benchmarks.common import measure, write_json
+from services.preprocessing import get_scalers, get_scaler_bank, FEATURE_COLS, TARGET_COLS
+
+
+def sklearn_transform(scalers, block):
+    # The previous per-feature path: one sklearn call per (T, N) slice.
+    out = block.copy()
+    for i, feat in enumerate(FEATURE_COLS):
+        if feat in scalers:
+            out[:, :, i] = scalers[feat].transform(block[:, :, i])
+    return out
+
+
+def sklearn_inverse(scalers, values):
+    out = np.empty(values.shape)
+    for i, feat in enumerate(TARGET_COLS):
+        out[:, i] = scalers[feat].inverse_transform(values[:, i].reshape(1, -1)).flatten()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-feature sklearn scaling vs the vectorized scaler bank.")
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    scalers = get_scalers()
+    bank = get_scaler_bank()
+    num_nodes = bank.scale.shape[0]
+
+    rng = np.random.default_rng(0)
+    block = rng.uniform(0.0, 100.0, size=(24, num_nodes, len(FEATURE_COLS)))
+    prediction = rng.uniform(0.0, 1.0, size=(num_nodes, len(TARGET_COLS)))
+
+    transform_diff = float(np.abs(bank.transform(block) - sklearn_transform(scalers, block)).max())
+    inverse_diff = float(np.abs(bank.inverse_transform(prediction) - sklearn_inverse(scalers, prediction)).max())
+    print(f"parity: transform max abs diff {transform_diff:.2e}, inverse max abs diff {inverse_diff:.2e}")
+
+    results = {"transform_max_abs_diff": transform_diff, "inverse_max_abs_diff": inverse_diff}
+    for name, before, after in (
+        ("transform (24, N, F)", lambda: sklearn_transform(scalers, block), lambda: bank.transform(block)),
+        ("inverse (N, targets)", lambda: sklearn_inverse(scalers, prediction), lambda: bank.inverse_transform(prediction)),
+    ):
+        sk = measure(before, repeat=args.repeat, warmup=10)
+        vec = measure(after, repeat=args.repeat, warmup=10)
+        results[name] = {"sklearn": sk, "bank": vec}
+        print(f"{name:>22}: sklearn {sk['p50_ms'] * 1000:>8.1f}us  bank {vec['p50_ms'] * 1000:>7.1f}us  ({sk['p50_ms'] / vec['p50_ms']:.0f}x)")
+
+    if args.json:
+        write_json(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+
+import torch
+
+from benchmarks.common import measure, random_input, max_abs_diff, write_json
+from services.inference import GraphConv, NUM_FEATURES
+
+NODE_COUNTS = [13, 250, 2500, 25000]
+
+
+def random_graph(num_nodes, neighbours, seed=0):
+    # Row-normalised graph with a self loop and `neighbours` random edges per
+    # node, built directly in COO form so large N never allocates N^2.
+    generator = torch.Generator().manual_seed(seed)
+    rows = torch.arange(num_nodes).repeat_interleave(neighbours + 1)
+    cols = torch.randint(0, num_nodes, (num_nodes, neighbours + 1), generator=generator)
+    cols[:, 0] = torch.arange(num_nodes)
+    values = torch.full((rows.numel(),), 1.0 / (neighbours + 1))
+    adj = torch.sparse_coo_tensor(torch.stack([rows, cols.flatten()]), values, (num_nodes, num_nodes))
+    return adj.coalesce()
+
+
+def dense_bytes(num_nodes):
+    return num_nodes * num_nodes * 4
+
+
+def csr_bytes(adj):
+    return sum(t.numel() * t.element_size() for t in (adj.crow_indices(), adj.col_indices(), adj.values()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dense vs sparse GraphConv scaling with node count.")
+    parser.add_argument("--nodes", type=int, nargs="+", default=NODE_COUNTS)
+    parser.add_argument("--neighbours", type=int, default=8)
+    parser.add_argument("--seq-len", type=int, default=24)
+    parser.add_argument("--hidden", type=int, default=128)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--dense-limit-mb", type=float, default=1024.0)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'N':>7} {'edges':>9} {'dense MB':>10} {'sparse MB':>10} {'dense p50':>11} {'sparse p50':>11}")
+    for num_nodes in args.nodes:
+        adj = random_graph(num_nodes, args.neighbours)
+        x = random_input(1, seq_len=args.seq_len, num_nodes=num_nodes, num_features=NUM_FEATURES)
+
+        torch.manual_seed(0)
+        sparse_layer = GraphConv(NUM_FEATURES, args.hidden, adj.to_sparse_csr()).eval()
+        row = {
+            "nodes": num_nodes,
+            "edges": int(adj._nnz()),
+            "dense_adj_mb": dense_bytes(num_nodes) / 2**20,
+            "sparse_adj_mb": csr_bytes(sparse_layer.adj) / 2**20,
+            "dense": None,
+        }
+
+        with torch.no_grad():
+            row["sparse"] = measure(lambda: sparse_layer(x), repeat=args.repeat, warmup=2)
+
+            if row["dense_adj_mb"] <= args.dense_limit_mb:
+                torch.manual_seed(0)
+                dense_layer = GraphConv(NUM_FEATURES, args.hidden, adj.to_dense()).eval()
+                diff = max_abs_diff(dense_layer(x), sparse_layer(x))
+                if diff > 1e-4:
+                    raise AssertionError(f"N={num_nodes}: sparse and dense outputs differ by {diff:.2e}")
+                row["dense"] = measure(lambda: dense_layer(x), repeat=args.repeat, warmup=2)
+                del dense_layer
+
+        results.append(row)
+        dense_p50 = f"{row['dense']['p50_ms']:>9.2f}ms" if row["dense"] else f"{'skipped':>11}"
+        print(
+            f"{num_nodes:>7} {row['edges']:>9} {row['dense_adj_mb']:>10.2f} {row['sparse_adj_mb']:>10.3f} "
+            f"{dense_p50} {row['sparse']['p50_ms']:>9.2f}ms"
+        )
+
+    if args.json:
+        write_json(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.common import write_json
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each probe runs in a fresh interpreter so import caches never hide the cost.
+PROBES = {
+    "import services.stations": "import services.stations",
+    "import services.preprocessing": "import services.preprocessing",
+    "import main": "import main",
+    "create_app": "import main; app = main.create_app()",
+    "first prediction": (
+        "import main, torch; from services.inference import predict_torch, SEQ_LEN, NUM_NODES, NUM_FEATURES; "
+        "app = main.create_app(warmup=False); "
+        "predict_torch(torch.zeros(1, SEQ_LEN, NUM_NODES, NUM_FEATURES), app.extensions['model_registry'].current().model)"
+    ),
+}
+
+TIMER = """
+import json, time
+start = time.perf_counter()
+{code}
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+
+def run_probe(code):
+    out = subprocess.run(
+        [sys.executable, "-c", TIMER.format(code=code)],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])["seconds"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and time to first prediction for the backend.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'probe':>30} {'min':>9} {'median':>9}")
+    for name, code in PROBES.items():
+        times = sorted(run_probe(code) for _ in range(args.repeat))
+        results[name] = {"min_s": times[0], "median_s": times[len(times) // 2]}
+        print(f"{name:>30} {times[0] * 1000:>7.0f}ms {times[len(times) // 2] * 1000:>7.0f}ms")
+
+    if args.json:
+        write_json(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
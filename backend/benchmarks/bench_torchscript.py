@@ -0,0 +1,42 @@
+import argparse
+import time
+
+import torch
+
+from benchmarks.common import measure, random_input, write_json
+from services.inference import get_model, predict_torch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eager vs TorchScript TGCN load time and latency.")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    models = {}
+    results = {"load_ms": {}, "latency": []}
+    for name, backend in (("eager", "torch"), ("scripted", "torchscript")):
+        start = time.perf_counter()
+        models[name] = get_model(backend=backend)
+        results["load_ms"][name] = (time.perf_counter() - start) * 1000.0
+        print(f"{name:>8} load: {results['load_ms'][name]:.1f}ms")
+
+    print(f"\n{'batch':>6} {'mode':>9} {'p50':>10} {'p99':>10}")
+    for batch_size in args.batch_sizes:
+        x = random_input(batch_size)
+        for name, model in models.items():
+            stats = measure(lambda: predict_torch(x, model), repeat=args.repeat, warmup=10)
+            results["latency"].append({"batch_size": batch_size, "mode": name, **stats})
+            print(f"{batch_size:>6} {name:>9} {stats['p50_ms']:>8.3f}ms {stats['p99_ms']:>8.3f}ms")
+
+    if args.json:
+        write_json(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import json
+import time
+
+import numpy as np
+import torch
+
+
+def measure(fn, repeat=50, warmup=5):
+    for _ in range(warmup):
+        fn()
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    times = np.array(times) * 1000.0
+    return {
+        "mean_ms": float(times.mean()),
+        "p50_ms": float(np.percentile(times, 50)),
+        "p90_ms": float(np.percentile(times, 90)),
+        "p99_ms": float(np.percentile(times, 99)),
+    }
+
+
+def random_input(batch_size, seq_len=24, num_nodes=13, num_features=10, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    return torch.rand(batch_size, seq_len, num_nodes, num_features, generator=generator)
+
+
+def max_abs_diff(a, b):
+    return float((a.float() - b.float()).abs().max())
+
+
+def write_json(results, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {path}")
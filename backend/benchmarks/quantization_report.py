@@ -0,0 +1,80 @@
+import argparse
+import io
+
+import numpy as np
+import torch
+
+from benchmarks.common import measure, random_input, write_json
+from services.history import load_history, scale_block, descale_block, sliding_windows
+from services.inference import get_model, predict_torch
+from services.preprocessing import get_scaler_bank, TARGET_COLS
+
+
+def run_windows(model, windows, batch_size):
+    outputs = []
+    for start in range(0, len(windows), batch_size):
+        batch = torch.from_numpy(np.ascontiguousarray(windows[start:start + batch_size]))
+        outputs.append(predict_torch(batch, model).numpy())
+    return np.concatenate(outputs, axis=0)
+
+
+def serialized_mb(model):
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy, memory and latency of int8 vs fp32 TGCN.")
+    parser.add_argument("--history", "--csv", dest="history", default="aqi_data.csv")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    models = {
+        "fp32": get_model(backend="torch", quantize=False),
+        "int8": get_model(backend="torch", quantize=True),
+    }
+
+    scalers = get_scaler_bank()
+    times, raw = load_history(args.history)
+    windows = sliding_windows(scale_block(times, raw, scalers))
+    predictions = {name: descale_block(run_windows(model, windows, args.batch_size), scalers) for name, model in models.items()}
+    print(f"Evaluated {len(windows)} window(s) from {args.history}")
+
+    # Windows whose next hour is in the history also get an error against the truth.
+    truth = raw[windows.shape[1]:]
+    scored = len(truth)
+
+    report = {"windows": len(windows), "pollutants": {}, "memory_mb": {}, "latency": {}}
+    print(f"\n{'pollutant':>9} {'int8 vs fp32 MAE':>17} {'max abs':>9} {'fp32 MAE':>9} {'int8 MAE':>9}")
+    for i, feat in enumerate(TARGET_COLS):
+        diff = np.abs(predictions["int8"][..., i] - predictions["fp32"][..., i])
+        row = {"mae_vs_fp32": float(diff.mean()), "max_abs_vs_fp32": float(diff.max())}
+        if scored:
+            for name in models:
+                row[f"{name}_mae"] = float(np.abs(predictions[name][:scored, :, i] - truth[:, :, i]).mean())
+        report["pollutants"][feat] = row
+        fp32_mae = f"{row['fp32_mae']:>9.3f}" if scored else f"{'-':>9}"
+        int8_mae = f"{row['int8_mae']:>9.3f}" if scored else f"{'-':>9}"
+        print(f"{feat:>9} {row['mae_vs_fp32']:>17.4f} {row['max_abs_vs_fp32']:>9.4f} {fp32_mae} {int8_mae}")
+
+    print(f"\n{'model':>6} {'state MB':>9} {'B=1 p50':>10} {'B=%d p50' % args.batch_size:>11}")
+    for name, model in models.items():
+        report["memory_mb"][name] = serialized_mb(model)
+        report["latency"][name] = {}
+        for batch_size in (1, args.batch_size):
+            x = random_input(batch_size)
+            report["latency"][name][batch_size] = measure(lambda: predict_torch(x, model), repeat=args.repeat, warmup=10)
+        print(
+            f"{name:>6} {report['memory_mb'][name]:>9.3f} "
+            f"{report['latency'][name][1]['p50_ms']:>8.3f}ms {report['latency'][name][args.batch_size]['p50_ms']:>9.3f}ms"
+        )
+
+    if args.json:
+        write_json(report, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,66 @@
-from flask import Flask, request, jsonify
+import os
+
+from flask import Blueprint, Flask, current_app, request, jsonify
 from flask_cors import CORS
 
-from services.preprocessing import predict, station_code_map, predict_detail, predict_multistep, get_pm25_for_station
-from services.inference import get_model
+from services.config import load_env
+from services.db import get_pool_metrics
+from services.stations import station_code_map
+
+MAX_UNCERTAINTY_SAMPLES = 256
+
+api = Blueprint("api", __name__)
+
+def get_engine():
+    return current_app.extensions["inference_engine"]
 
-app = Flask(__name__)
-cors = CORS(app, origins='*')
+# Nothing is loaded at import time; gunicorn builds one app per worker with
+#   gunicorn "main:create_app()"
+def create_app(warmup=True):
+    from services.registry import ModelRegistry
+    from services.engine import InferenceEngine
+    from services.window import WindowBuffer, DEFAULT_REFRESH_INTERVAL
+    from services.db import ensure_indexes
+    from services.preprocessing import check_fetch_plan
 
-GLOBAL_MODEL = get_model()
-print("Model loaded successfully.")
+    load_env()
+    app = Flask(__name__)
+    CORS(app, origins='*')
+
+    registry = ModelRegistry(poll_interval=float(os.getenv("MODEL_POLL_INTERVAL", 60)))
+    if warmup:
+        # Loading a version runs one dummy forward pass, so the worker only
+        # accepts traffic once the model is resident and warm.
+        registry.refresh()
+        print("Model loaded successfully.")
+        # Creates the time/station indexes once and flags an unindexed plan
+        # for the prediction query before the first request pays for it.
+        # Mongo being unreachable or read-only at boot must not kill the
+        # worker; requests then run unhinted.
+        try:
+            ensure_indexes()
+            check_fetch_plan()
+        except Exception as e:
+            print(f"Skipping Mongo index setup and query plan check: {e}")
+    registry.start()
+
+    # Each worker keeps the last 24 hours resident and only pulls newer
+    # documents, at most once per WINDOW_REFRESH_INTERVAL seconds.
+    window = WindowBuffer(min_interval=float(os.getenv("WINDOW_REFRESH_INTERVAL", DEFAULT_REFRESH_INTERVAL)))
+
+    app.extensions["model_registry"] = registry
+    app.extensions["window_buffer"] = window
+    app.extensions["inference_engine"] = InferenceEngine(registry, window)
+    app.register_blueprint(api)
+    return app
 
 #api/predict?station=Mapo-gu
-@app.route("/api/predict")
+@api.route("/api/predict")
 def predict_pollutant():
     try:
         station = request.args.get("station")
         station_code = station_code_map[station]
-        prediction, timestamp = predict(GLOBAL_MODEL, station_code)
+        prediction, timestamp = get_engine().predict(station_code)
         
         response = {
             "status": "success",
@@ -30,12 +74,12 @@ def predict_pollutant():
         return jsonify({"status": "error", "message": str(e)}), 500
     
 #api/predict-detail?station=Mapo-gu
-@app.route("/api/predict-detail")
+@api.route("/api/predict-detail")
 def predict_pollutant_detail():
     try:
         station = request.args.get("station")
         station_code = station_code_map[station]
-        no2_prediction, o3_prediction, co_prediction, so2_prediction, pm25_prediction, dominant_pollutant, timestamp = predict_detail(GLOBAL_MODEL, station_code)
+        no2_prediction, o3_prediction, co_prediction, so2_prediction, pm25_prediction, dominant_pollutant, timestamp = get_engine().predict_detail(station_code)
         
         response = {
             "status": "success",
@@ -53,14 +97,17 @@ def predict_pollutant_detail():
         print(e)
         return jsonify({"status": "error", "message": str(e)}), 500
     
-#api/forecasts?station=Mapo-gu
-@app.route("/api/forecasts")
+#api/forecasts?station=Mapo-gu&samples=64
+@api.route("/api/forecasts")
 def forecast_pollution():
     try:
         station = request.args.get("station")
         station_code = station_code_map[station]
-        result = predict_multistep(GLOBAL_MODEL)
-        response = get_pm25_for_station(result, station_code)
+        try:
+            samples = max(0, min(int(request.args.get("samples", 0)), MAX_UNCERTAINTY_SAMPLES))
+        except ValueError:
+            return jsonify({"status": "error", "message": "samples must be an integer"}), 400
+        response = get_engine().forecast(station_code, samples)
         
         return jsonify(response)
 
@@ -68,5 +115,10 @@ def forecast_pollution():
         print(e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
+#api/metrics/mongo
+@api.route("/api/metrics/mongo")
+def mongo_metrics():
+    return jsonify(get_pool_metrics())
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    create_app().run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,64 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+from services.backtest import run_backtest
+from services.history import load_history
+from services.inference import get_model
+from services.preprocessing import get_scaler_bank, TARGET_COLS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of TGCN over an hourly history.")
+    parser.add_argument("--history", required=True, help="CSV or Parquet in the aqi_data.csv schema")
+    parser.add_argument("--steps", type=int, default=6)
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--weights", default=None, help="checkpoint to evaluate instead of the serving model")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--output", default=None, help="per station/pollutant/horizon metrics as CSV")
+    parser.add_argument("--json", default=None, help="summary including throughput as JSON")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    start = time.perf_counter()
+    times, raw, observed = load_history(args.history, return_mask=True)
+    load_seconds = time.perf_counter() - start
+    print(f"Loaded {len(times)} hours x {raw.shape[1]} stations in {load_seconds:.2f}s")
+
+    model = get_model(backend="torch", weights_path=args.weights)
+    result = run_backtest(model, times, raw, get_scaler_bank(), args.steps, args.batch_size, observed=observed)
+    print(f"Backtested {result['windows']} windows in {result['seconds']:.2f}s ({result['windows_per_second']:.0f} windows/s)")
+
+    print(f"\n{'pollutant':>9} " + " ".join(f"{f'{h + 1}h MAE':>8}" for h in range(args.steps)))
+    for p, pollutant in enumerate(TARGET_COLS):
+        print(f"{pollutant:>9} " + " ".join(f"{np.nanmean(result['mae'][h, :, p]):>8.3f}" for h in range(args.steps)))
+
+    if args.output:
+        pd.DataFrame(result["rows"]).to_csv(args.output, index=False)
+        print(f"Metrics written to {args.output}")
+
+    if args.json:
+        summary = {
+            "history": args.history,
+            "hours": len(times),
+            "windows": result["windows"],
+            "load_seconds": load_seconds,
+            "backtest_seconds": result["seconds"],
+            "windows_per_second": result["windows_per_second"],
+            "scored_targets": int(result["scored"].sum()),
+            "mae_by_horizon": {p: np.nanmean(result["mae"][:, :, i], axis=1).tolist() for i, p in enumerate(TARGET_COLS)},
+            "rmse_by_horizon": {p: np.nanmean(result["rmse"][:, :, i], axis=1).tolist() for i, p in enumerate(TARGET_COLS)},
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Summary written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import os
+
+import torch
+
+from services.adjacency import (
+    METHODS, METRICS, NORMALIZATIONS, STATION_INFO_PATH, build_adjacency, get_adjacency, load_station_coords,
+)
+from services.config import MODEL_DIR
+from services.inference import ADJ_MATRIX_FILE, load_adj_matrix
+from services.stations import keep_stations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the station adjacency matrix from station coordinates.")
+    parser.add_argument("--stations", type=int, nargs="+", default=keep_stations)
+    parser.add_argument("--station-info", default=STATION_INFO_PATH)
+    parser.add_argument("--method", choices=METHODS, default="gaussian")
+    parser.add_argument("--metric", choices=METRICS, default="haversine")
+    parser.add_argument("--sigma-scale", type=float, default=0.5)
+    parser.add_argument("--threshold", type=float, default=0.3)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--normalize", choices=NORMALIZATIONS, default="row")
+    parser.add_argument("--no-self-loops", action="store_true")
+    parser.add_argument("--sparse", action="store_true")
+    parser.add_argument("--no-cache", action="store_true", help="Rebuild even if a cached artifact exists.")
+    parser.add_argument("--output", help="Also save the matrix here, e.g. a registry version directory's station_adj_matrix.pt.")
+    parser.add_argument("--compare", default=os.path.join(MODEL_DIR, ADJ_MATRIX_FILE),
+                        help="Report the difference against an existing matrix.")
+    args = parser.parse_args()
+
+    params = dict(
+        method=args.method, metric=args.metric, sigma_scale=args.sigma_scale, threshold=args.threshold,
+        k=args.k, self_loops=not args.no_self_loops, normalize=args.normalize, sparse=args.sparse,
+    )
+    if args.no_cache:
+        adj = build_adjacency(load_station_coords(args.stations, args.station_info), **params)
+    else:
+        adj = get_adjacency(args.stations, args.station_info, **params)
+
+    dense = adj.to_dense() if adj.is_sparse else adj
+    edges = int((dense > 0).sum()) - (0 if args.no_self_loops else dense.size(0))
+    print(f"Adjacency {tuple(dense.shape)}: {edges} edges, density {(dense > 0).float().mean():.3f}")
+
+    if args.compare and os.path.exists(args.compare) and list(args.stations) == list(keep_stations):
+        existing = load_adj_matrix(args.compare)
+        existing = existing.to_dense() if existing.is_sparse else existing
+        if existing.shape == dense.shape:
+            print(f"Max abs diff vs {args.compare}: {float((existing - dense).abs().max()):.2e}")
+
+    if args.output:
+        torch.save(adj, args.output)
+        print(f"Adjacency saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import argparse
+
+import torch
+
+from services.inference import get_model, predict_torch, SEQ_LEN, NUM_NODES, NUM_FEATURES
+from services.onnx_backend import export_onnx, OnnxModel, ONNX_MODEL_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the TGCN checkpoint to ONNX and check onnxruntime parity.")
+    parser.add_argument("--output", default=ONNX_MODEL_PATH)
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--atol", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    model = get_model(backend="torch")
+    export_onnx(model, args.output, args.opset)
+    print(f"ONNX model saved to {args.output}")
+
+    onnx_model = OnnxModel(args.output)
+    for batch_size in (1, 4, 32):
+        x = torch.rand(batch_size, SEQ_LEN, NUM_NODES, NUM_FEATURES)
+        diff = float((predict_torch(x, onnx_model) - predict_torch(x, model)).abs().max())
+        if diff > args.atol:
+            raise AssertionError(f"B={batch_size}: onnxruntime output differs from PyTorch by {diff:.2e}")
+        print(f"B={batch_size:3d} parity with PyTorch: max abs diff {diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import argparse
+
+import torch
+
+from services.inference import get_model, export_torchscript, SCRIPTED_MODEL_PATH, SEQ_LEN, NUM_NODES, NUM_FEATURES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the TGCN checkpoint as a frozen TorchScript artifact.")
+    parser.add_argument("--output", default=SCRIPTED_MODEL_PATH)
+    parser.add_argument("--atol", type=float, default=1e-5)
+    args = parser.parse_args()
+
+    model = get_model(backend="torch")
+    export_torchscript(model, args.output)
+    print(f"TorchScript model saved to {args.output}")
+
+    loaded = torch.jit.load(args.output, map_location=torch.device("cpu"))
+    x = torch.rand(8, SEQ_LEN, NUM_NODES, NUM_FEATURES)
+    with torch.no_grad():
+        diff = float((loaded(x) - model(x)).abs().max())
+    if diff > args.atol:
+        raise AssertionError(f"Scripted output differs from eager by {diff:.2e}")
+    print(f"Parity with eager model: max abs diff {diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import argparse
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+
+from services.history import load_history, scale_block, forecast_windows
+from services.inference import TGCN, get_adj_matrix, get_model, NUM_NODES, NUM_FEATURES, TARGET_DIM
+from services.preprocessing import get_scaler_bank
+
+
+def batches(windows, targets, indices, batch_size):
+    for start in range(0, len(indices), batch_size):
+        idx = indices[start:start + batch_size]
+        x = torch.from_numpy(np.ascontiguousarray(windows[idx]))
+        # (B, H, N, targets) -> (B, N, H, targets), the layout of forward_horizons
+        y = torch.from_numpy(np.ascontiguousarray(targets[idx])).transpose(1, 2)
+        yield x, y
+
+
+def evaluate(model, windows, targets, indices, batch_size, criterion):
+    model.eval()
+    total, count = 0.0, 0
+    with torch.no_grad():
+        for x, y in batches(windows, targets, indices, batch_size):
+            total += criterion(model.forward_horizons(x), y).item() * len(x)
+            count += len(x)
+    return total / max(count, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train a direct multi-horizon TGCN head.")
+    parser.add_argument("--history", "--csv", dest="history", required=True, help="hourly history in the aqi_data.csv schema (CSV or Parquet)")
+    parser.add_argument("--horizons", type=int, default=6)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--lr", type=float, default=0.001)
+    parser.add_argument("--hidden-dim", type=int, default=128)
+    parser.add_argument("--dropout", type=float, default=0.1)
+    parser.add_argument("--train-split", type=float, default=0.8)
+    parser.add_argument("--val-split", type=float, default=0.1)
+    parser.add_argument("--warm-start", action="store_true", help="initialise graph conv and GRU from the single-step checkpoint")
+    parser.add_argument("--output", default="tcgn_model_direct.pth")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    base = None
+    if args.warm_start:
+        # The trunk is copied as-is, so its width has to match.
+        base = get_model(backend="torch", quantize=False, precision="fp32").state_dict()
+        base_hidden = base["gc1.fc.weight"].size(0)
+        if args.hidden_dim != base_hidden:
+            parser.error(f"--warm-start needs --hidden-dim {base_hidden} to match the single-step checkpoint (got {args.hidden_dim})")
+
+    torch.manual_seed(args.seed)
+    rng = np.random.default_rng(args.seed)
+
+    # The serving scalers are reused so the checkpoint drops into a model
+    # registry version next to the existing feature_scalers.pkl.
+    times, raw = load_history(args.history)
+    block = scale_block(times, raw, get_scaler_bank())
+    windows, targets, _ = forecast_windows(times, block, args.horizons)
+
+    # Chronological split, as in the original notebook.
+    total = len(windows)
+    train_end = int(total * args.train_split)
+    val_end = train_end + int(total * args.val_split)
+    train_idx = np.arange(train_end)
+    val_idx = np.arange(train_end, val_end)
+    test_idx = np.arange(val_end, total)
+    print(f"{total} windows: {len(train_idx)} train, {len(val_idx)} val, {len(test_idx)} test")
+
+    model = TGCN(NUM_NODES, NUM_FEATURES, args.hidden_dim, TARGET_DIM, get_adj_matrix(), args.dropout, horizons=args.horizons)
+    if base is not None:
+        trunk = {k: v for k, v in base.items() if not k.startswith("fc.")}
+        model.load_state_dict(trunk, strict=False)
+
+    optimizer = optim.Adam(model.parameters(), lr=args.lr)
+    criterion = nn.MSELoss()
+
+    best_val, best_state = float("inf"), None
+    for epoch in range(args.epochs):
+        model.train()
+        rng.shuffle(train_idx)
+        total_loss, count = 0.0, 0
+        for x, y in batches(windows, targets, train_idx, args.batch_size):
+            optimizer.zero_grad()
+            loss = criterion(model.forward_horizons(x), y)
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item() * len(x)
+            count += len(x)
+
+        val_loss = evaluate(model, windows, targets, val_idx, args.batch_size, criterion)
+        print(f"Epoch {epoch + 1} Loss: {total_loss / max(count, 1):.5f} Val Loss: {val_loss:.5f}")
+        if val_loss < best_val:
+            best_val = val_loss
+            best_state = {k: v.clone() for k, v in model.state_dict().items()}
+
+    model.load_state_dict(best_state)
+    test_loss = evaluate(model, windows, targets, test_idx, args.batch_size, criterion)
+    print(f"Best Val Loss: {best_val:.5f} Test Loss: {test_loss:.5f}")
+
+    torch.save(model.state_dict(), args.output)
+    print(f"Model saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import time
+
+import numpy as np
+import torch
+
+from services.history import scale_block, descale_block, forecast_windows
+from services.inference import is_direct, SEQ_LEN
+from services.preprocessing import rollout_batch, TARGET_COLS
+from services.stations import keep_stations
+
+
+def forecast_batch(model, x, future_time):
+    # (B, N, steps, targets) normalised forecasts for a batch of windows
+    steps = future_time.size(1)
+    if is_direct(model, steps):
+        with torch.no_grad():
+            return model.forward_horizons(x)[:, :, :steps]
+    return rollout_batch(model, x, future_time)
+
+
+def run_backtest(model, times, raw, scalers, steps=6, batch_size=512, stations=keep_stations, observed=None):
+    # Rolling-origin backtest: every SEQ_LEN-hour window in the history is a
+    # forecast origin. Windows are strided views of one scaled block and are
+    # only copied one batch at a time; errors are accumulated per
+    # (horizon, station, pollutant) so memory stays flat for long histories.
+    # With the (T, N, 6) observed mask from load_history, only measured
+    # targets are scored, never interpolated ones.
+    block = scale_block(times, raw, scalers)
+    windows, _, future_time = forecast_windows(times, block, steps)
+    total = len(windows)
+
+    abs_sum = np.zeros((steps, raw.shape[1], raw.shape[2]))
+    sq_sum = np.zeros_like(abs_sum)
+    count = np.zeros_like(abs_sum)
+
+    model.eval()
+    start_time = time.perf_counter()
+    for start in range(0, total, batch_size):
+        end = min(start + batch_size, total)
+        x = torch.from_numpy(np.ascontiguousarray(windows[start:end]))
+        t = torch.from_numpy(np.ascontiguousarray(future_time[start:end])).float()
+
+        pred = forecast_batch(model, x, t).transpose(1, 2).numpy()
+        pred = descale_block(pred, scalers)
+        # Origin i forecasts hours i + SEQ_LEN + h: a (B, steps, N, targets) view of raw
+        truth = np.stack([raw[SEQ_LEN + start + h:SEQ_LEN + end + h] for h in range(steps)], axis=1)
+
+        err = pred - truth
+        if observed is not None:
+            scored = np.stack([observed[SEQ_LEN + start + h:SEQ_LEN + end + h] for h in range(steps)], axis=1)
+            err = np.where(scored, err, 0.0)
+            count += scored.sum(axis=0)
+        else:
+            count += len(err)
+        abs_sum += np.abs(err).sum(axis=0)
+        sq_sum += (err ** 2).sum(axis=0)
+    elapsed = time.perf_counter() - start_time
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mae = np.where(count > 0, abs_sum / count, np.nan)
+        rmse = np.sqrt(np.where(count > 0, sq_sum / count, np.nan))
+    rows = []
+    for h in range(steps):
+        for s, station in enumerate(stations):
+            for p, pollutant in enumerate(TARGET_COLS):
+                rows.append({
+                    "horizon": h + 1,
+                    "station": station,
+                    "pollutant": pollutant,
+                    "mae": float(mae[h, s, p]),
+                    "rmse": float(rmse[h, s, p]),
+                    "scored": int(count[h, s, p]),
+                })
+
+    return {
+        "windows": total,
+        "seconds": elapsed,
+        "windows_per_second": total / elapsed if elapsed > 0 else float("inf"),
+        "mae": mae,
+        "rmse": rmse,
+        "scored": count,
+        "rows": rows,
+    }
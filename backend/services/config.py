@@ -0,0 +1,15 @@
+import os
+
+from dotenv import load_dotenv
+
+# Every artifact path is anchored at backend/, never at the process cwd.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.path.join(BASE_DIR, 'ai_models')
+
+_env_loaded = False
+
+def load_env():
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv(os.path.join(BASE_DIR, '.env'))
+        _env_loaded = True
@@ -0,0 +1,209 @@
+import os
+import threading
+
+from pymongo import ASCENDING, DESCENDING, IndexModel, MongoClient, monitoring
+from pymongo.errors import PyMongoError
+
+from services.config import load_env
+
+DB_NAME = "Gama"
+COLLECTION_NAME = "seoul_thirteen"
+
+TIME_FIELD = "data.time.s"
+STATION_FIELD = "data.city.name"
+
+# time_station backs the newest-hours range scan every prediction runs;
+# station_time serves per-station history lookups.
+TIME_INDEX = "time_station"
+INDEXES = [
+    IndexModel([(TIME_FIELD, DESCENDING), (STATION_FIELD, ASCENDING)], name=TIME_INDEX),
+    IndexModel([(STATION_FIELD, ASCENDING), (TIME_FIELD, DESCENDING)], name="station_time"),
+]
+
+# Fail fast instead of pymongo's 30s server selection default, so a slow or
+# unreachable replica surfaces as an error rather than a hung request.
+CLIENT_OPTIONS = {
+    "maxPoolSize": ("MONGO_MAX_POOL_SIZE", int, 20),
+    "minPoolSize": ("MONGO_MIN_POOL_SIZE", int, 0),
+    "waitQueueTimeoutMS": ("MONGO_WAIT_QUEUE_TIMEOUT_MS", int, 2000),
+    "serverSelectionTimeoutMS": ("MONGO_SERVER_SELECTION_TIMEOUT_MS", int, 5000),
+    "connectTimeoutMS": ("MONGO_CONNECT_TIMEOUT_MS", int, 5000),
+    "socketTimeoutMS": ("MONGO_SOCKET_TIMEOUT_MS", int, 10000),
+    "readPreference": ("MONGO_READ_PREFERENCE", str, "secondaryPreferred"),
+}
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    # Counts connection pool events for the current process's client.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {
+            "pools_created": 0,
+            "pools_cleared": 0,
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "checked_out": 0,
+        }
+
+    def _add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self.counters[name] += delta
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counters)
+
+    def pool_created(self, event):
+        self._add(pools_created=1)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add(pools_cleared=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add(connections_created=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(connections_closed=1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._add(checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        self._add(checkouts=1, checked_out=1)
+
+    def connection_checked_in(self, event):
+        self._add(checked_out=-1)
+
+_client = None
+_client_pid = None
+_metrics = None
+_client_lock = threading.Lock()
+_time_index_ready = False
+
+def _reset_after_fork():
+    # A client inherited through fork (gunicorn --preload) shares sockets and
+    # monitor threads with the parent; the child drops it and lazily builds
+    # its own pool.
+    global _client, _client_pid, _metrics, _client_lock
+    _client = None
+    _client_pid = None
+    _metrics = None
+    _client_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def client_options():
+    options = {}
+    for option, (env, cast, default) in CLIENT_OPTIONS.items():
+        options[option] = cast(os.getenv(env, default))
+    if os.getenv("MONGO_MAX_STALENESS_SECONDS"):
+        options["maxStalenessSeconds"] = int(os.getenv("MONGO_MAX_STALENESS_SECONDS"))
+    return options
+
+def get_client():
+    global _client, _client_pid, _metrics
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                load_env()
+                mongo_uri = os.getenv("MONGO_URI")
+                if not mongo_uri:
+                    raise ValueError("MONGO_URI not found in .env")
+                _metrics = PoolMetrics()
+                _client = MongoClient(mongo_uri, event_listeners=[_metrics], **client_options())
+                _client_pid = os.getpid()
+    return _client
+
+def get_pool_metrics():
+    metrics = _metrics
+    return {
+        "pid": os.getpid(),
+        "connected": metrics is not None and _client_pid == os.getpid(),
+        "options": client_options(),
+        "pool": metrics.snapshot() if metrics is not None else {},
+    }
+
+def get_collection():
+    return get_client()[DB_NAME][COLLECTION_NAME]
+
+def ensure_indexes(collection=None):
+    # Runs once at startup from create_app, never on the request path: index
+    # builds need write access and can outlast socketTimeoutMS on a large
+    # collection. A failed build is only logged. Queries hint TIME_INDEX only
+    # once it is known to exist, so a missing index costs a slower plan
+    # instead of failing every query.
+    global _time_index_ready
+    collection = collection if collection is not None else get_collection()
+    if os.getenv("MONGO_ENSURE_INDEXES", "1") != "0":
+        try:
+            collection.create_indexes(INDEXES)
+        except PyMongoError as e:
+            print(f"Could not create indexes on '{collection.name}': {e}")
+    _time_index_ready = TIME_INDEX in collection.index_information()
+    if not _time_index_ready:
+        print(f"Warning: index '{TIME_INDEX}' missing on '{collection.name}'; queries run without a hint")
+    return _time_index_ready
+
+def time_index_hint():
+    # Keyword arguments for find/aggregate on the time range.
+    return {"hint": TIME_INDEX} if _time_index_ready else {}
+
+EXPLAIN_SKIP_KEYS = ("command", "originalCommand", "parsedQuery", "serverParameters", "rejectedPlans")
+
+def _explain_summary(node, stages, keys):
+    # Walks any explain document (classic $cursor or SBE layout) collecting
+    # plan stage names, pipeline stage names and totalKeysExamined values.
+    if isinstance(node, dict):
+        if isinstance(node.get("stage"), str):
+            stages.append(node["stage"])
+        stages.extend(key for key in node if key.startswith("$sort"))
+        if isinstance(node.get("totalKeysExamined"), int):
+            keys.append(node["totalKeysExamined"])
+        for key, value in node.items():
+            # The echoed command still lists the original $sort stage.
+            if key not in EXPLAIN_SKIP_KEYS:
+                _explain_summary(value, stages, keys)
+    elif isinstance(node, list):
+        for item in node:
+            _explain_summary(item, stages, keys)
+
+def check_query_plan(pipeline, limit, collection=None):
+    # Explains the aggregation exactly as it runs on the hot path, without a
+    # hint so the planner's own choice is what gets checked, and flags plans
+    # whose cost grows with the collection: a collection scan, a blocking
+    # sort, or far more index keys examined than documents wanted.
+    collection = collection if collection is not None else get_collection()
+    explain = collection.database.command(
+        "explain",
+        {"aggregate": collection.name, "pipeline": pipeline, "cursor": {}},
+        verbosity="executionStats",
+    )
+    stages, keys = [], []
+    _explain_summary(explain, stages, keys)
+
+    problems = []
+    if "COLLSCAN" in stages:
+        problems.append("collection scan")
+    if "SORT" in stages or any(stage.startswith("$sort") for stage in stages):
+        problems.append("blocking sort")
+    if keys and max(keys) > 4 * limit:
+        problems.append(f"{max(keys)} index keys examined for {limit} documents")
+    if problems:
+        print(f"Warning: '{collection.name}' fetch query plan: {', '.join(problems)} (stages: {stages})")
+        return False
+    return True
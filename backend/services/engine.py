@@ -0,0 +1,81 @@
+import threading
+
+import pandas as pd
+
+from services.preprocessing import (
+    get_data_version,
+    window_input_tensor,
+    FeaturePipeline,
+    station_prediction,
+    station_detail,
+    predict_multistep,
+    get_pm25_for_station,
+)
+from services.snapshots import get_exporter
+from services.window import window_frame
+
+
+class InferenceEngine:
+    # One forward pass already yields every station x pollutant, so the engine
+    # runs the model once per data hour (and model version) and every
+    # endpoint slices the result.
+    def __init__(self, registry, window=None):
+        self.registry = registry
+        self.window = window
+        if window is None:
+            self.pipeline = FeaturePipeline()
+        else:
+            # The input tensor is built straight from the resident ring.
+            self.pipeline = FeaturePipeline(loader=window.snapshot, build=self._window_features)
+        self._lock = threading.Lock()
+        self._forecasts = {}
+
+    def _data_timestamp(self):
+        if self.window is None:
+            return get_data_version()
+        if self.window.refresh():
+            # Late documents can fill an hour without moving the latest
+            # timestamp, so both caches are dropped explicitly.
+            self.pipeline.invalidate()
+            self._forecasts = {}
+        return self.window.latest
+
+    def _window_features(self, snapshot, scaler_bank):
+        features = window_input_tensor(snapshot, scaler_bank)
+        # The long frame is only needed for the Parquet snapshot, which is
+        # built once per data change rather than per request.
+        values, times = snapshot
+        get_exporter().submit(window_frame(values, times, self.window.stations), pd.Timestamp(features[1][-1]))
+        return features
+
+    def latest(self):
+        version = self.registry.current()
+        return self.pipeline.prediction(version.model, self._data_timestamp(), version.scalers)
+
+    def forecast_all(self, samples=0):
+        version = self.registry.current()
+        timestamp = self._data_timestamp()
+        key = (version.version, timestamp)
+        forecast = self._forecasts.get(samples)
+        if forecast is not None and forecast[0] == key:
+            return forecast[1]
+
+        with self._lock:
+            forecast = self._forecasts.get(samples)
+            if forecast is None or forecast[0] != key:
+                features = self.pipeline.features(timestamp, version.scalers)
+                result = predict_multistep(version.model, samples=samples, feature_scalers=version.scalers, features=features)
+                forecast = (key, result)
+                self._forecasts[samples] = forecast
+        return forecast[1]
+
+    def predict(self, station_code):
+        values, last_time_step = self.latest()
+        return station_prediction(values, station_code), last_time_step
+
+    def predict_detail(self, station_code):
+        values, last_time_step = self.latest()
+        return (*station_detail(values, station_code), last_time_step)
+
+    def forecast(self, station_code, samples=0):
+        return get_pm25_for_station(self.forecast_all(samples), station_code)
@@ -0,0 +1,107 @@
+import numpy as np
+
+HOUR = np.timedelta64(1, 'h')
+
+
+def to_hours(values):
+    # Measurement dates (strings, datetime64 or Timestamps) -> datetime64[h]
+    return np.asarray(values).astype('datetime64[s]').astype('datetime64[h]')
+
+
+def cyclical_time_features(hours):
+    # datetime64[h] (T,) -> (T, 4) hour/month sin/cos, as the model was trained with
+    hour = (hours - hours.astype('datetime64[D]')) / HOUR
+    month = hours.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    return np.stack([
+        np.sin(2 * np.pi * hour / 24.0),
+        np.cos(2 * np.pi * hour / 24.0),
+        np.sin(2 * np.pi * month / 12.0),
+        np.cos(2 * np.pi * month / 12.0),
+    ], axis=-1)
+
+
+def scatter_records(hours, codes, values, stations, start, num_hours):
+    # (timestamp, station) records -> dense (num_hours, N, P) block with NaN
+    # where nothing was observed, plus the (num_hours, N) mask of fully
+    # observed station-hours. Duplicates are averaged per value; records
+    # outside the range or for unknown stations are dropped.
+    stations = np.asarray(stations)
+    order = np.argsort(stations)
+    pos = np.searchsorted(stations, codes, sorter=order).clip(max=len(stations) - 1)
+    station_idx = order[pos]
+    t = ((hours - start) / HOUR).astype(np.int64)
+    keep = (stations[station_idx] == codes) & (t >= 0) & (t < num_hours)
+
+    values = np.asarray(values, dtype=np.float64)[keep]
+    present = ~np.isnan(values)
+    index = (t[keep], station_idx[keep])
+
+    shape = (num_hours, len(stations), values.shape[-1])
+    total = np.zeros(shape)
+    count = np.zeros(shape)
+    np.add.at(total, index, np.where(present, values, 0.0))
+    np.add.at(count, index, present)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        block = np.where(count > 0, total / count, np.nan)
+    return block, (count > 0).all(axis=-1)
+
+
+def interpolate_time(block):
+    # Vectorised linear interpolation along axis 0 of a (T, ...) array; edges
+    # take the nearest observed value, all-NaN series stay NaN.
+    T = block.shape[0]
+    valid = ~np.isnan(block)
+    index = np.arange(T).reshape((T,) + (1,) * (block.ndim - 1))
+
+    prev = np.maximum.accumulate(np.where(valid, index, -1), axis=0)
+    nxt = np.flip(np.minimum.accumulate(np.flip(np.where(valid, index, T), axis=0), axis=0), axis=0)
+    has_prev, has_next = prev >= 0, nxt < T
+
+    prev_val = np.take_along_axis(block, prev.clip(0, T - 1), axis=0)
+    next_val = np.take_along_axis(block, nxt.clip(0, T - 1), axis=0)
+    # Observed points have prev == nxt; give them a span of 1 so the
+    # (discarded) weight there never divides by zero.
+    span = np.where(has_prev & has_next & (nxt > prev), nxt - prev, 1)
+    weight = (index - prev) / span
+    both = prev_val + (next_val - prev_val) * weight
+
+    out = np.where(has_prev & has_next, both, np.where(has_prev, prev_val, next_val))
+    return np.where(valid, block, out)
+
+
+def neighbour_fill(block, adj):
+    # Fills remaining NaN (a station with no readings in the whole window)
+    # with the adjacency-weighted mean of its neighbours at the same hour.
+    missing = np.isnan(block)
+    if not missing.any():
+        return block
+    weights = np.array(adj, dtype=np.float64)
+    np.fill_diagonal(weights, 0.0)
+    valid = ~missing
+    total = np.einsum('nm,tmp->tnp', weights, np.where(valid, block, 0.0))
+    norm = np.einsum('nm,tmp->tnp', weights, valid.astype(np.float64))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        estimate = total / norm
+    return np.where(missing & (norm > 0), estimate, block)
+
+
+def fill_block(block, adj=None):
+    # Gap-fills a dense (T, N, P) block: along time first, then from graph
+    # neighbours for stations with nothing in the window.
+    block = interpolate_time(block)
+    if adj is not None:
+        block = neighbour_fill(block, adj)
+    return block
+
+
+def build_window(hours, codes, values, stations, seq_len, adj=None, end=None):
+    # Records -> ((seq_len, N, P) gap-filled block, datetime64[h] hours,
+    # observed mask). The window ends at `end` (default: newest record), so
+    # missing or duplicated hours never change its shape.
+    hours = to_hours(hours)
+    if end is None:
+        end = hours.max()
+    start = end - (seq_len - 1) * HOUR
+    block, observed = scatter_records(hours, np.asarray(codes), values, stations, start, seq_len)
+    return fill_block(block, adj), start + np.arange(seq_len) * HOUR, observed
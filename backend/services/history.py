@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from services.gapfill import interpolate_time, scatter_records, to_hours
+from services.inference import SEQ_LEN
+from services.preprocessing import resolve_scaler_bank, keep_stations, TARGET_COLS, TIME_COLS
+
+
+def read_history(path):
+    if str(path).endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def load_history(path, stations=keep_stations, return_mask=False):
+    # Hourly history in the aqi_data.csv schema -> (timestamps, (T, N, 6) raw
+    # block), plus the (T, N, 6) mask of actually observed values when
+    # return_mask is set; everything else in raw is interpolated.
+    df = read_history(path)
+    df['Measurement date'] = pd.to_datetime(df['Measurement date'])
+    df = df[df['Station code'].isin(stations)]
+    if df.empty:
+        raise ValueError(f"No rows for the expected stations in {path}")
+
+    for col in TARGET_COLS:
+        df[col] = df[col].replace(-1, np.nan)
+
+    times = pd.date_range(start=df['Measurement date'].min(), end=df['Measurement date'].max(), freq='h')
+    raw, _ = scatter_records(
+        to_hours(df['Measurement date'].to_numpy()),
+        df['Station code'].to_numpy(),
+        df[TARGET_COLS].to_numpy(dtype=np.float64),
+        stations,
+        to_hours(times[:1])[0],
+        len(times),
+    )
+    if return_mask:
+        return times, interpolate_time(raw), ~np.isnan(raw)
+    return times, interpolate_time(raw)
+
+
+def time_features(times):
+    hours = np.asarray(times.hour)
+    months = np.asarray(times.month)
+    return np.stack([
+        np.sin(2 * np.pi * hours / 24.0),
+        np.cos(2 * np.pi * hours / 24.0),
+        np.sin(2 * np.pi * months / 12.0),
+        np.cos(2 * np.pi * months / 12.0),
+    ], axis=-1)
+
+
+def scale_block(times, raw, scalers=None):
+    T, N, _ = raw.shape
+    block = np.empty((T, N, len(TARGET_COLS) + len(TIME_COLS)), dtype=np.float32)
+    block[:, :, :len(TARGET_COLS)] = raw
+    block[:, :, len(TARGET_COLS):] = time_features(times)[:, None, :]
+    return resolve_scaler_bank(scalers).transform(block).astype(np.float32)
+
+
+def descale_block(prediction, scalers=None):
+    # (..., N, 6) normalised model output -> real units
+    return resolve_scaler_bank(scalers).inverse_transform(np.asarray(prediction, dtype=np.float64))
+
+
+def sliding_windows(block, seq_len=SEQ_LEN):
+    # Zero-copy strided view of every seq_len-hour window: (W, seq_len, N, F)
+    if len(block) < seq_len:
+        raise ValueError(f"History only has {len(block)} hours. Model requires {seq_len}h.")
+    windows = np.lib.stride_tricks.sliding_window_view(block, seq_len, axis=0)
+    return windows.transpose(0, 3, 1, 2)
+
+
+def horizon_view(array, horizons, seq_len=SEQ_LEN):
+    # Zero-copy view of the `horizons` hours following each seq_len window:
+    # (W, horizons, ...) with W = T - seq_len - horizons + 1
+    if len(array) < seq_len + horizons:
+        raise ValueError(f"History only has {len(array)} hours. Need {seq_len + horizons}h for {horizons} horizons.")
+    view = np.lib.stride_tricks.sliding_window_view(array[seq_len:], horizons, axis=0)
+    return np.moveaxis(view, -1, 1)
+
+
+def forecast_windows(times, block, horizons, seq_len=SEQ_LEN):
+    # Inputs, scaled targets and future time features for every window that
+    # has `horizons` hours of ground truth after it.
+    targets = horizon_view(block[..., :len(TARGET_COLS)], horizons, seq_len)
+    future_time = horizon_view(time_features(times), horizons, seq_len)
+    windows = sliding_windows(block, seq_len)[:len(targets)]
+    return windows, targets, future_time
@@ -1,61 +1,339 @@
+import copy
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 import numpy as np
 
-adj_matrix = torch.load(
-    "ai_models/station_adj_matrix.pt",
-    map_location=torch.device("cpu")
-)
+from services.config import MODEL_DIR
+
+MODEL_FILE = 'tcgn_model.pth'
+SCRIPTED_MODEL_FILE = 'tcgn_model_scripted.pt'
+ONNX_MODEL_FILE = 'tcgn_model.onnx'
+ADJ_MATRIX_FILE = 'station_adj_matrix.pt'
+
+MODEL_PATH = os.path.join(MODEL_DIR, MODEL_FILE)
+SCRIPTED_MODEL_PATH = os.path.join(MODEL_DIR, SCRIPTED_MODEL_FILE)
+
+def load_adj_matrix(path=os.path.join(MODEL_DIR, ADJ_MATRIX_FILE)):
+    return torch.load(
+        path,
+        map_location=torch.device("cpu")
+    )
+
+@lru_cache(maxsize=None)
+def get_adj_matrix():
+    return load_adj_matrix()
 
 NUM_NODES = 13
 NUM_FEATURES = 10
 TARGET_DIM = 6
+SEQ_LEN = 24
+
+BACKENDS = ("torch", "torchscript", "onnx")
+PRECISIONS = ("fp32", "bf16")
+BF16_TOLERANCE = 2e-2
+EMBEDDING_CACHE_SIZE = 256
 
 class GraphConv(nn.Module):
-    def __init__(self, in_features, out_features, adj_matrix):
+    def __init__(self, in_features, out_features, adj_matrix, sparse=False):
         super(GraphConv, self).__init__()
-        self.adj = adj_matrix
+        # A sparse (COO/CSR) adjacency keeps memory and matmul cost
+        # proportional to the number of edges instead of N^2.
+        if sparse and adj_matrix.layout == torch.strided:
+            adj_matrix = adj_matrix.to_sparse_csr()
+        elif adj_matrix.layout == torch.sparse_coo:
+            adj_matrix = adj_matrix.coalesce()
+        self.sparse = adj_matrix.layout != torch.strided
+        # Non-persistent buffer: follows .to(dtype) with the weights but stays
+        # out of the state_dict, so checkpoints are unchanged.
+        self.register_buffer("adj", adj_matrix, persistent=False)
         self.fc = nn.Linear(in_features, out_features)
 
     def forward(self, x):
-        out = torch.bmm(self.adj.unsqueeze(0).repeat(x.size(0), 1, 1), x)
+        # x is (..., N, F). Moving the node axis to the front turns the
+        # neighbour aggregation for every batch/timestep into a single
+        # (N, N) @ (N, rest) GEMM, without ever copying the adjacency.
+        xt = x.movedim(-2, 0)
+        flat = xt.reshape(xt.size(0), -1)
+        if self.sparse:
+            out = torch.sparse.mm(self.adj, flat)
+        else:
+            out = torch.mm(self.adj, flat)
+        out = out.reshape(xt.shape).movedim(0, -2)
         return self.fc(out)
 
+class EmbeddingCache:
+    # Bounded LRU of per-timestep GraphConv + ReLU outputs. Entries are keyed by
+    # (timestamp, row bytes), so an observed hour never aliases a forecast row
+    # that was fed back for the same timestamp.
+    def __init__(self, maxsize=EMBEDDING_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __deepcopy__(self, memo):
+        # quantize_dynamic deep-copies the model; the copy has new weights,
+        # so it starts with an empty cache.
+        return EmbeddingCache(self.maxsize)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def embed(self, model, x, timestamps):
+        # x is (1, T, N, F); returns (1, T, N, H), convolving only unseen rows.
+        keys = [(ts, x[0, t].numpy().tobytes()) for t, ts in enumerate(timestamps)]
+        rows = [None] * len(keys)
+        missing = []
+        with self._lock:
+            for t, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is None:
+                    missing.append(t)
+                else:
+                    self._entries.move_to_end(key)
+                    rows[t] = entry
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            embedded = model.embed(x[:, missing])
+            with self._lock:
+                for j, t in enumerate(missing):
+                    # clone() so an entry does not pin the whole batch embedding.
+                    rows[t] = embedded[0, j].clone()
+                    self._entries[keys[t]] = rows[t]
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+        return torch.stack(rows, dim=0).unsqueeze(0)
+
 class TGCN(nn.Module):
-    def __init__(self, num_nodes, num_features, hidden_dim, output_dim, adj_matrix, dropout_prob=0.0):
+    def __init__(self, num_nodes, num_features, hidden_dim, output_dim, adj_matrix, dropout_prob=0.0, fused=True, sparse=False, horizons=1):
         super(TGCN, self).__init__()
-        self.gc1 = GraphConv(num_features, hidden_dim, adj_matrix)
+        self.fused = fused
+        self.horizons = horizons
+        self.gc1 = GraphConv(num_features, hidden_dim, adj_matrix, sparse)
         self.gru = nn.GRU(hidden_dim, hidden_dim, batch_first=True)
         self.dropout = nn.Dropout(dropout_prob)
-        self.fc = nn.Linear(hidden_dim, output_dim)
+        # A direct multi-horizon model emits every horizon from one pass;
+        # horizons=1 is the original single-step head.
+        self.fc = nn.Linear(hidden_dim, output_dim * horizons)
+        self.embedding_cache = EmbeddingCache()
+        # Set by to_bfloat16(); float32 inputs are cast on the way in and
+        # predictions are returned as float32.
+        self.compute_dtype = torch.float32
 
-    def forward(self, x):
-        B, T, N, F = x.shape
+    def embed(self, x):
+        # (B, T, N, F) -> (B, T, N, H) graph-conv embedding of every timestep
+        x = x.to(self.compute_dtype)
+        if self.fused:
+            return torch.relu(self.gc1(x))
         out = []
-        for t in range(T):
+        for t in range(x.size(1)):
             xt = x[:, t, :, :]
             xt = torch.relu(self.gc1(xt))
             out.append(xt)
-        out = torch.stack(out, dim=1)
-        out = out.transpose(1, 2)
+        return torch.stack(out, dim=1)
+
+    def encode(self, emb, state=None):
+        # (B, T, N, H) embeddings -> (B * N, H) last GRU state per station.
+        # `state` continues from an earlier (B * N, H) state instead of zeros.
+        B, T, N, H = emb.shape
+        out = emb.transpose(1, 2)
         out = out.reshape(B * N, T, -1)
-        out, _ = self.gru(out)
-        out = out[:, -1, :]
-        out = self.dropout(out)
+        out, _ = self.gru(out, None if state is None else state.unsqueeze(0).contiguous())
+        return out[:, -1, :]
+
+    def head(self, hidden, B, N, all_horizons=False):
+        out = self.dropout(hidden)
+        out = self.fc(out)
+        out = out.view(B, N, self.horizons, -1).float()
+        if all_horizons:
+            return out
+        return out[:, :, 0]
+
+    def sample_head(self, hidden, B, N, samples, all_horizons=False):
+        # Monte-Carlo dropout: dropout only sits between the GRU and the head,
+        # so the trunk runs once and K masks are drawn over a (K, B*N, H) batch.
+        out = hidden.unsqueeze(0).expand(samples, -1, -1)
+        out = F.dropout(out, p=self.dropout.p, training=True)
         out = self.fc(out)
-        out = out.view(B, N, -1)
-        return out
+        out = out.view(samples, B, N, self.horizons, -1).float()
+        if all_horizons:
+            return out
+        return out[:, :, :, 0]
+
+    def forward_embeddings(self, emb):
+        return self.head(self.encode(emb), emb.size(0), emb.size(2))
+
+    def forward_horizons(self, x):
+        # (B, T, N, F) -> (B, N, horizons, targets)
+        return self.head(self.encode(self.embed(x)), x.size(0), x.size(2), all_horizons=True)
+
+    def forward(self, x):
+        return self.forward_embeddings(self.embed(x))
+
+def get_model(sparse=False, scripted=False, backend=None, quantize=None, model_dir=None, weights_path=None, precision=None):
+    if backend is None:
+        backend = "torchscript" if scripted else os.getenv("INFERENCE_BACKEND")
+    if backend is None and os.getenv("USE_SCRIPTED_MODEL") == "1":
+        # Deprecated switch from before INFERENCE_BACKEND; still honoured so
+        # existing deployments keep serving the scripted model.
+        print("Warning: USE_SCRIPTED_MODEL=1 is deprecated, use INFERENCE_BACKEND=torchscript")
+        backend = "torchscript"
+    if backend is None:
+        backend = "torch"
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}'. Expected one of {BACKENDS}.")
+    if precision is None:
+        precision = os.getenv("INFERENCE_PRECISION", "fp32")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown inference precision '{precision}'. Expected one of {PRECISIONS}.")
+    if precision == "bf16" and backend != "torch":
+        raise ValueError("bfloat16 inference is only available on the eager torch backend.")
+
+    # model_dir points at a versioned checkpoint directory; the default is the
+    # flat ai_models/ layout the service has always shipped with.
+    model_path = MODEL_PATH if model_dir is None else os.path.join(model_dir, MODEL_FILE)
+    if weights_path is not None:
+        model_path = weights_path
+    scripted_path = SCRIPTED_MODEL_PATH if model_dir is None else os.path.join(model_dir, SCRIPTED_MODEL_FILE)
+    adj = get_adj_matrix() if model_dir is None else load_adj_matrix(os.path.join(model_dir, ADJ_MATRIX_FILE))
+
+    if backend == "onnx":
+        from services.onnx_backend import OnnxModel
+        if model_dir is None:
+            return OnnxModel()
+        return OnnxModel(os.path.join(model_dir, ONNX_MODEL_FILE))
+
+    if os.getenv("INFERENCE_THREADS"):
+        torch.set_num_threads(int(os.getenv("INFERENCE_THREADS")))
+
+    if backend == "torchscript":
+        # Frozen TorchScript artifact from scripts/export_torchscript.py; the
+        # adjacency matrix is baked in, so no Python module is rebuilt.
+        model = torch.jit.load(scripted_path, map_location=torch.device('cpu'))
+        model.eval()
+        return model
 
-def get_model():
-    model = TGCN(NUM_NODES, NUM_FEATURES, 128, TARGET_DIM, adj_matrix, 0.1)
     state_dict = torch.load(
-        'ai_models/tcgn_model.pth',
+        model_path,
         map_location=torch.device('cpu')
     )
+    # The head width tells single-step (6) and direct multi-horizon (6 * H)
+    # checkpoints apart; the graph-conv output width gives the hidden size
+    # (128 for the shipped model, anything for scripts/train_multihorizon.py).
+    horizons = state_dict['fc.weight'].size(0) // TARGET_DIM
+    hidden_dim = state_dict['gc1.fc.weight'].size(0)
+    model = TGCN(NUM_NODES, NUM_FEATURES, hidden_dim, TARGET_DIM, adj, 0.1, sparse=sparse, horizons=horizons)
     model.load_state_dict(state_dict)
+
+    if quantize is None:
+        quantize = os.getenv("INFERENCE_QUANTIZE") == "1"
+    if quantize and precision == "bf16":
+        raise ValueError("int8 quantization and bfloat16 precision cannot be combined.")
+    if quantize:
+        model = quantize_model(model)
+    if precision == "bf16":
+        if bf16_supported():
+            reference = copy.deepcopy(model)
+            model = to_bfloat16(model)
+            check_precision(reference, model, float(os.getenv("INFERENCE_BF16_TOLERANCE", BF16_TOLERANCE)))
+        else:
+            print("Warning: CPU has no native bfloat16 support, falling back to fp32")
+    return model
+
+def bf16_supported():
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+def to_bfloat16(model):
+    # Weights, GRU state and the adjacency buffer are all stored in bfloat16,
+    # halving resident memory per loaded model version.
+    model.eval()
+    model = model.to(torch.bfloat16)
+    model.compute_dtype = torch.bfloat16
+    model.embedding_cache.clear()
     return model
 
-def predict_torch(tensor_input, model):
+def check_precision(reference, model, tolerance=BF16_TOLERANCE, batch_size=8):
+    # Accuracy guard: on scaled inputs in [0, 1] the reduced-precision model
+    # must stay within `tolerance` of the fp32 reference.
+    x = torch.rand(batch_size, SEQ_LEN, NUM_NODES, NUM_FEATURES, generator=torch.Generator().manual_seed(0))
+    reference.eval()
+    model.eval()
+    with torch.no_grad():
+        diff = float((model(x) - reference(x)).abs().max())
+    if diff > tolerance:
+        raise ValueError(f"Reduced-precision model differs from fp32 by {diff:.2e} (tolerance {tolerance:.0e})")
+    return diff
+
+def quantize_model(model):
+    # Dynamic int8: GRU and Linear weights are stored as int8 and activations
+    # are quantized on the fly, which suits small-batch CPU serving.
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(model, {nn.GRU, nn.Linear}, dtype=torch.qint8)
+
+def export_torchscript(model, path=SCRIPTED_MODEL_PATH):
+    if model.gc1.sparse:
+        raise ValueError("TorchScript export requires a dense adjacency matrix.")
+
+    model.eval()
+    example = torch.zeros(1, SEQ_LEN, NUM_NODES, NUM_FEATURES)
+    check_inputs = [(torch.rand(batch_size, SEQ_LEN, NUM_NODES, NUM_FEATURES),) for batch_size in (1, 4, 32)]
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example, check_inputs=check_inputs)
+    scripted = torch.jit.freeze(traced)
+    torch.jit.save(scripted, path)
+    return scripted
+
+def embed_cached(model, x, timestamps):
+    cache = getattr(model, "embedding_cache", None)
+    if cache is None or timestamps is None or x.size(0) != 1:
+        return model.embed(x)
+    return cache.embed(model, x, timestamps)
+
+def forward_cached(model, x, timestamps):
+    if not isinstance(model, TGCN):
+        return model(x)
+    return model.forward_embeddings(embed_cached(model, x, timestamps))
+
+def forward_horizons_cached(model, x, timestamps):
+    emb = embed_cached(model, x, timestamps)
+    return model.head(model.encode(emb), x.size(0), x.size(2), all_horizons=True)
+
+def forward_with_samples(model, x, timestamps, samples, all_horizons=False):
+    # Point prediction plus K dropout samples from one shared trunk pass.
+    if not isinstance(model, TGCN):
+        raise ValueError("Uncertainty sampling requires the eager torch backend.")
+    emb = embed_cached(model, x, timestamps)
+    hidden = model.encode(emb)
+    B, N = x.size(0), x.size(2)
+    return model.head(hidden, B, N, all_horizons), model.sample_head(hidden, B, N, samples, all_horizons)
+
+def is_direct(model, steps):
+    return isinstance(model, TGCN) and model.horizons >= steps
+
+def predict_torch(tensor_input, model, timestamps=None, precision="fp32"):
+    # precision="bf16" runs an fp32 model under CPU autocast instead of
+    # converting its weights; either way the result is float32. Autocast
+    # embeddings bypass the cache so they never leak into fp32 calls.
     model.eval()
     with torch.no_grad():
-        return model(tensor_input)
\ No newline at end of file
+        if precision == "bf16" and isinstance(model, TGCN):
+            with torch.autocast("cpu", dtype=torch.bfloat16):
+                return forward_cached(model, tensor_input, None).float()
+        return forward_cached(model, tensor_input, timestamps)
\ No newline at end of file
@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+import torch
+
+from services.inference import SEQ_LEN, NUM_NODES, NUM_FEATURES, MODEL_DIR, ONNX_MODEL_FILE
+
+ONNX_MODEL_PATH = os.path.join(MODEL_DIR, ONNX_MODEL_FILE)
+
+
+def export_onnx(model, path=ONNX_MODEL_PATH, opset_version=17):
+    if model.gc1.sparse:
+        raise ValueError("ONNX export requires a dense adjacency matrix.")
+
+    model.eval()
+    example = torch.zeros(1, SEQ_LEN, NUM_NODES, NUM_FEATURES)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            example,
+            path,
+            input_names=["x"],
+            output_names=["prediction"],
+            dynamic_axes={"x": {0: "batch"}, "prediction": {0: "batch"}},
+            opset_version=opset_version,
+        )
+    return path
+
+
+class OnnxModel:
+    # Drop-in stand-in for the torch module: takes and returns torch tensors,
+    # so predict_torch and the preprocessing code work unchanged.
+    def __init__(self, path=ONNX_MODEL_PATH, num_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        if num_threads is None and os.getenv("INFERENCE_THREADS"):
+            num_threads = int(os.getenv("INFERENCE_THREADS"))
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+
+        self.path = path
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def eval(self):
+        return self
+
+    def __call__(self, x):
+        x = x.detach().cpu().numpy().astype(np.float32, copy=False)
+        out = self.session.run(None, {self.input_name: x})[0]
+        return torch.from_numpy(out)
@@ -3,336 +3,448 @@ import pandas as pd
 import numpy as np
 import torch
 import os
-from pymongo import MongoClient, DESCENDING
-from services.inference import predict_torch
-from dotenv import load_dotenv
+import threading
+from functools import lru_cache
+from pymongo import DESCENDING
+from services.config import MODEL_DIR
+from services.db import check_query_plan, get_collection, time_index_hint
+from services.inference import SEQ_LEN, TGCN, get_adj_matrix, predict_torch, embed_cached, forward_cached, forward_with_samples, forward_horizons_cached, is_direct
+from services.gapfill import build_window, cyclical_time_features, fill_block, to_hours
+from services.scaler_bank import as_scaler_bank
+from services.snapshots import get_exporter
+from services.stations import station_code_map, keep_stations
 from datetime import datetime, timedelta
 
-scalers = joblib.load("ai_models/feature_scalers.pkl")
-
-load_dotenv()
-MONGO_URI = os.getenv("MONGO_URI")
-
-if not MONGO_URI:
-    raise ValueError("MONGO_URI not found in .env")
-
-client = MongoClient(MONGO_URI)
-db = client["Gama"]
-collection = db["seoul_thirteen"]
-
-station_code_map = {
-    "Jongno-gu": 101,
-    "Jung-gu": 102,
-    "Seodaemun-gu": 105,
-    "Mapo-gu": 106,
-    "Seongdong-gu": 107,
-    "Dongdaemun-gu": 109,
-    "Seongbuk-gu": 111,
-    "Gangbuk-gu": 112,
-    "Dobong-gu": 113,
-    "Yeongdeungpo-gu": 119,
-    "Dongjak-gu": 120,
-    "Gwanak-gu": 121,
-    "Seocho-gu": 122,
+SCALERS_FILE = "feature_scalers.pkl"
+
+@lru_cache(maxsize=None)
+def get_scalers():
+    return joblib.load(os.path.join(MODEL_DIR, SCALERS_FILE))
+
+@lru_cache(maxsize=None)
+def get_scaler_bank():
+    return as_scaler_bank(get_scalers(), FEATURE_COLS)
+
+def resolve_scaler_bank(feature_scalers=None):
+    # Accepts None (serving scalers), a ScalerBank, or a dict of sklearn scalers.
+    if feature_scalers is None:
+        return get_scaler_bank()
+    return as_scaler_bank(feature_scalers, FEATURE_COLS)
+
+WAQI_FIELDS = {
+    'NO2': 'no2',
+    'O3': 'o3',
+    'CO': 'co',
+    'SO2': 'so2',
+    'PM10': 'pm10',
+    'PM2.5': 'pm25',
 }
 
-keep_stations = [101, 102, 105, 106, 107, 109, 111, 112, 113, 119, 120, 121, 122]
+def _as_double(path):
+    return {"$convert": {"input": path, "to": "double", "onError": None, "onNull": None}}
+
+def flatten_pipeline(limit, since):
+    # Range-filters on the indexed time field, sorts and limits server-side,
+    # then keeps only the station name, the measurement time and six typed
+    # pollutant readings, so the WAQI forecast arrays and attributions never
+    # leave Mongo. Field names avoid dots ("PM2.5"), which $project does not
+    # allow.
+    project = {
+        "_id": 0,
+        "city": {"$arrayElemAt": [{"$split": ["$data.city.name", ","]}, 0]},
+        "time": "$data.time.s",
+    }
+    for field in WAQI_FIELDS.values():
+        project[field] = _as_double(f"$data.iaqi.{field}.v")
+    return [
+        {"$match": {"data.time.s": {"$gt": since}}},
+        {"$sort": {"data.time.s": DESCENDING}},
+        {"$limit": limit},
+        {"$project": project},
+    ]
 
 def get_df_data():
-    REQUIRED_RECORDS = 13 * 24
-    aqi = list(
-        collection.find({}, {"_id": 0})
-                  .sort("data.time.s", DESCENDING)
-                  .limit(REQUIRED_RECORDS)
-    )
-    if not aqi:
+    df = fetch_records(SEQ_LEN)
+    if df.empty:
         raise ValueError("No data found in MongoDB collection 'seoul_thirteen'")
-    
-    result = []
-    for doc in aqi:
-        row = {}
-        try:
-            
-            city = doc['data']['city']['name']
-            city_name = city.split(",")[0]
-
-            if city_name not in station_code_map:
-                print('city name not in station code')
-
-            row['Station code'] = station_code_map[city_name]
-            row['Measurement date'] = doc['data']['time']['s']
-            row['NO2'] = doc['data']['iaqi']['no2']['v']
-            row['O3'] = doc['data']['iaqi']['o3']['v']
-            row['CO'] = doc['data']['iaqi']['co']['v']
-            row['SO2'] = doc['data']['iaqi']['so2']['v']
-            row['PM10'] = doc['data']['iaqi']['pm10']['v']
-            row['PM2.5'] = doc['data']['iaqi']['pm25']['v']
-            result.append(row)
-        except KeyError as e:
-            print(f"Skipping malformed document: {e}")
-            continue
-    
-    df = pd.DataFrame(result)
-    # df.to_csv("aqi_data.csv", index=False, encoding="utf-8")
-
     return df
 
-def predict(model, station_code, device='cpu'):
-    # df = pd.read_csv('aqi_data.csv')
-    df = get_df_data()
-    if df.empty:
-        raise ValueError("DataFrame is empty. Check Database connection.")
-
-    required_stations = [101, 102, 105, 106, 107, 109, 111, 112, 113, 119, 120, 121, 122]
-
-    if not all(station in df['Station code'].unique() for station in required_stations):
-        missing = set(required_stations) - set(df['Station code'].unique())
-        raise ValueError(f"Missing data for stations: {missing}")
-
-    df['Measurement date'] = pd.to_datetime(df['Measurement date'])
-
-    unique_times = df['Measurement date'].unique()
-    print(unique_times)
-    if len(unique_times) != 24:
-        raise ValueError(f"Must contain exactly 24 hours of data. Found {len(unique_times)}.")
-
-    df = df.sort_values(by=['Measurement date', 'Station code'])
-    df.to_csv("aqi_data_sorted.csv", index=False, encoding="utf-8")
-
-    df['hour'] = df['Measurement date'].dt.hour
-    df['month'] = df['Measurement date'].dt.month
-
-    df['hour_sin'] = np.sin(2 * np.pi * df['hour'] / 24.0)
-    df['hour_cos'] = np.cos(2 * np.pi * df['hour'] / 24.0)
-    df['month_sin'] = np.sin(2 * np.pi * df['month'] / 12.0)
-    df['month_cos'] = np.cos(2 * np.pi * df['month'] / 12.0)
-
-    feature_cols = ['NO2', 'O3', 'CO', 'SO2', 'PM10', 'PM2.5',
-                    'hour_sin', 'hour_cos', 'month_sin', 'month_cos']
-
-    processed_features = []
-    num_stations = 13
-
-    for feat in feature_cols:
-        values = df[feat].values.reshape(24, num_stations)
-
-        val_df = pd.DataFrame(values)
-
-        if 'sin' not in feat and 'cos' not in feat:
-            if feat in scalers:
-                values_norm = scalers[feat].transform(val_df.values)
-            else:
-                print(f"Warning: Scaler for {feat} not found. Using raw values.")
-                values_norm = val_df.values
-        else:
-            values_norm = val_df.values
-            
-        processed_features.append(values_norm)
-
-    data_block = np.stack(processed_features, axis=-1)
-
-    input_tensor = torch.FloatTensor(data_block).unsqueeze(0)
-
-    prediction = predict_torch(input_tensor, model)
-
-    pm25_values = prediction[0, :, 5].numpy() 
-    pm25_input_for_scaler = pm25_values.reshape(1, 13)
-    pm25_actual = scalers['PM2.5'].inverse_transform(pm25_input_for_scaler)
-    pm25_final = pm25_actual.flatten()
-
-    last_time_step = df['Measurement date'].max()
-
-    index = keep_stations.index(station_code)
-    pm25_value = pm25_final[index]
+def hours_before(timestamp, hours):
+    return (pd.Timestamp(timestamp) - pd.Timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
+
+def fetch_records(hours, since=None):
+    # Flattened rows for the newest `hours` hours (or only those measured
+    # after `since`) as a Station code / Measurement date / pollutant
+    # DataFrame; may be empty. The time range keeps the index scan bounded
+    # however large the collection grows.
+    if since is None:
+        since = hours_before(get_latest_timestamp(), hours)
+    limit = hours * len(keep_stations)
+    aqi = list(get_collection().aggregate(flatten_pipeline(limit, since), **time_index_hint()))
+    columns = ['city', 'time', *WAQI_FIELDS.values()]
+    raw = pd.DataFrame.from_records(aqi, columns=columns)
+
+    codes = raw['city'].map(station_code_map)
+    unknown = codes.isna() & raw['city'].notna()
+    if unknown.any():
+        print(f"city name not in station code: {sorted(raw.loc[unknown, 'city'].unique())}")
+
+    valid = codes.notna() & raw[columns[1:]].notna().all(axis=1)
+    if not valid.all():
+        print(f"Skipping {int((~valid).sum())} malformed document(s)")
+
+    df = pd.DataFrame({'Station code': codes[valid].astype(int), 'Measurement date': raw['time'][valid]})
+    for col, field in WAQI_FIELDS.items():
+        df[col] = raw[field][valid].to_numpy(dtype=np.float64)
+    return df.reset_index(drop=True)
+
+TARGET_COLS = ['NO2', 'O3', 'CO', 'SO2', 'PM10', 'PM2.5']
+TIME_COLS = ['hour_sin', 'hour_cos', 'month_sin', 'month_cos']
+FEATURE_COLS = TARGET_COLS + TIME_COLS
+DETAIL_POLLUTANTS = ['NO2', 'O3', 'CO', 'SO2', 'PM2.5']
+UNCERTAINTY_QUANTILES = {'p05': 0.05, 'p50': 0.5, 'p95': 0.95}
+MIN_OBSERVED_FRACTION = 0.5
+
+def check_fetch_plan(hours=SEQ_LEN):
+    # Startup check of the query fetch_records runs on every refresh.
+    since = hours_before(get_latest_timestamp(), hours)
+    limit = hours * len(keep_stations)
+    return check_query_plan(flatten_pipeline(limit, since), limit)
+
+def get_latest_timestamp():
+    latest = get_collection().find_one(
+        {},
+        {"_id": 0, "data.time.s": 1},
+        sort=[("data.time.s", DESCENDING)],
+        **time_index_hint()
+    )
+    if latest is None:
+        raise ValueError("No data found in MongoDB collection 'seoul_thirteen'")
+    return latest['data']['time']['s']
+
+def get_data_version(hours=SEQ_LEN):
+    # (latest timestamp, documents in the newest `hours` hours). Unlike the
+    # timestamp alone it also changes when a late station document fills an
+    # hour that is already held, so features memoized on it never go stale.
+    # The count is answered from the time index.
+    latest = get_latest_timestamp()
+    count = get_collection().count_documents(
+        {"data.time.s": {"$gt": hours_before(latest, hours)}},
+        **time_index_hint()
+    )
+    return latest, count
 
-    return pm25_value, last_time_step
+def get_dense_adjacency():
+    adj = get_adj_matrix()
+    return (adj.to_dense() if adj.layout != torch.strided else adj).numpy()
 
-def predict_detail(model, station_code, device='cpu'):
-    # df = pd.read_csv('aqi_data.csv')
-    df = get_df_data()
+def build_input_tensor(df, feature_scalers=None, adj=None):
+    # Scatters the (time, station) records straight into a dense
+    # (24, 13, 10) window ending at the newest record. Missing or duplicate
+    # station-hours are interpolated along time; a station with no readings
+    # at all falls back to its graph neighbours.
     if df.empty:
         raise ValueError("DataFrame is empty. Check Database connection.")
 
-    required_stations = [101, 102, 105, 106, 107, 109, 111, 112, 113, 119, 120, 121, 122]
-
-    if not all(station in df['Station code'].unique() for station in required_stations):
-        missing = set(required_stations) - set(df['Station code'].unique())
+    raw, hours, observed = build_window(
+        df['Measurement date'].to_numpy(),
+        df['Station code'].to_numpy(),
+        df[TARGET_COLS].to_numpy(dtype=np.float64),
+        keep_stations,
+        SEQ_LEN,
+        adj=get_dense_adjacency() if adj is None else adj,
+    )
+    features = assemble_input(raw, hours, observed, feature_scalers)
+    get_exporter().submit(df, pd.Timestamp(hours[-1]))
+    return features
+
+def window_input_tensor(window, feature_scalers=None, adj=None):
+    # (oldest-first (W, 13, 6) block with NaN for missing station-hours,
+    # DatetimeIndex) as held by WindowBuffer.snapshot() -> the same
+    # (input_tensor, timestamps) as build_input_tensor, gap-filled in place
+    # without a round trip through the long DataFrame.
+    values, times = window
+    if len(times) < SEQ_LEN:
+        raise ValueError("Window buffer is empty. Check Database connection.")
+    values = values[-SEQ_LEN:]
+    observed = ~np.isnan(values).any(axis=-1)
+    raw = fill_block(values, get_dense_adjacency() if adj is None else adj)
+    return assemble_input(raw, to_hours(times[-SEQ_LEN:].to_numpy()), observed, feature_scalers)
+
+def assemble_input(raw, hours, observed, feature_scalers=None):
+    # Gap-filled (24, 13, 6) block, its datetime64[h] hours and observed mask
+    # -> validated, scaled (1, 24, 13, 10) input tensor and timestamps.
+    scaler_bank = resolve_scaler_bank(feature_scalers)
+    coverage = observed.mean()
+    if coverage < MIN_OBSERVED_FRACTION:
+        raise ValueError(f"Only {coverage:.0%} of station-hours observed in the last {SEQ_LEN} hours.")
+    if np.isnan(raw).any():
+        missing = sorted({keep_stations[n] for n in np.unique(np.nonzero(np.isnan(raw))[1])})
         raise ValueError(f"Missing data for stations: {missing}")
+    if coverage < 1.0:
+        print(f"Filled {int((~observed).sum())} missing station-hour(s)")
 
-    df['Measurement date'] = pd.to_datetime(df['Measurement date'])
-
-    unique_times = df['Measurement date'].unique()
-    print(unique_times)
-    if len(unique_times) != 24:
-        raise ValueError(f"Must contain exactly 24 hours of data. Found {len(unique_times)}.")
-
-    df = df.sort_values(by=['Measurement date', 'Station code'])
-    df.to_csv("aqi_data_sorted.csv", index=False, encoding="utf-8")
-
-    df['hour'] = df['Measurement date'].dt.hour
-    df['month'] = df['Measurement date'].dt.month
-
-    df['hour_sin'] = np.sin(2 * np.pi * df['hour'] / 24.0)
-    df['hour_cos'] = np.cos(2 * np.pi * df['hour'] / 24.0)
-    df['month_sin'] = np.sin(2 * np.pi * df['month'] / 12.0)
-    df['month_cos'] = np.cos(2 * np.pi * df['month'] / 12.0)
-
-    feature_cols = ['NO2', 'O3', 'CO', 'SO2', 'PM10', 'PM2.5',
-                    'hour_sin', 'hour_cos', 'month_sin', 'month_cos']
-
-    processed_features = []
-    num_stations = 13
-
-    for feat in feature_cols:
-        values = df[feat].values.reshape(24, num_stations)
-
-        val_df = pd.DataFrame(values)
-
-        if 'sin' not in feat and 'cos' not in feat:
-            if feat in scalers:
-                values_norm = scalers[feat].transform(val_df.values)
-            else:
-                print(f"Warning: Scaler for {feat} not found. Using raw values.")
-                values_norm = val_df.values
-        else:
-            values_norm = val_df.values
-            
-        processed_features.append(values_norm)
-
-    data_block = np.stack(processed_features, axis=-1)
+    data_block = np.empty((SEQ_LEN, len(keep_stations), len(FEATURE_COLS)))
+    data_block[:, :, :len(TARGET_COLS)] = raw
+    data_block[:, :, len(TARGET_COLS):] = cyclical_time_features(hours)[:, None, :]
+    data_block = scaler_bank.transform(data_block)
 
     input_tensor = torch.FloatTensor(data_block).unsqueeze(0)
 
-    prediction = predict_torch(input_tensor, model)
+    timestamps = pd.DatetimeIndex(hours)
+
+    return input_tensor, timestamps
+
+def descale_prediction(prediction, feature_scalers=None):
+    # (1, stations, targets) normalised output -> (stations, targets) in real units
+    scaler_bank = resolve_scaler_bank(feature_scalers)
+    return scaler_bank.inverse_transform(prediction[0].numpy().astype(np.float64))
+
+class FeaturePipeline:
+    # Fetch, validation, cyclical features and scaling run once per (data
+    # version, station set, scalers); the de-scaled prediction
+    # is memoized per model on top of that. Every station- or
+    # pollutant-specific call within the hour slices the same arrays.
+    # build(loader(), scaler_bank) turns whatever the loader returns into
+    # (input_tensor, timestamps).
+    def __init__(self, loader=get_df_data, stations=keep_stations, build=build_input_tensor):
+        self.loader = loader
+        self.build = build
+        self.stations = tuple(stations)
+        self._key = None
+        self._features = None
+        self._predictions = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        # Called when new data arrives; also covers corrections that reuse
+        # an already-seen timestamp.
+        with self._lock:
+            self._key = None
+            self._features = None
+            self._predictions = {}
+
+    def _ensure(self, data_version, feature_scalers):
+        scaler_bank = resolve_scaler_bank(feature_scalers)
+        key = (data_version, self.stations, id(scaler_bank))
+        if self._key != key:
+            self._features = self.build(self.loader(), scaler_bank)
+            self._predictions = {}
+            self._key = key
+        return scaler_bank
+
+    def features(self, data_version, feature_scalers=None):
+        # -> (input_tensor, timestamps)
+        with self._lock:
+            self._ensure(data_version, feature_scalers)
+            return self._features
+
+    def prediction(self, model, data_version, feature_scalers=None, predict_fn=None):
+        # -> (values (stations, targets), last timestamp)
+        with self._lock:
+            scaler_bank = self._ensure(data_version, feature_scalers)
+            entry = self._predictions.get(id(model))
+            if entry is None or entry[0] is not model:
+                input_tensor, timestamps = self._features
+                if predict_fn is None:
+                    prediction = predict_torch(input_tensor, model, timestamps)
+                else:
+                    prediction = predict_fn(input_tensor, model, timestamps)
+                entry = (model, descale_prediction(prediction, scaler_bank), timestamps[-1])
+                self._predictions[id(model)] = entry
+            return entry[1], entry[2]
+
+_pipeline = FeaturePipeline()
+
+def predict_all(model, device='cpu'):
+    return _pipeline.prediction(model, get_data_version())
+
+def station_prediction(values, station_code):
+    index = keep_stations.index(station_code)
+    return values[index, TARGET_COLS.index('PM2.5')]
 
-    feature_idx = {
-        'NO2': 0,
-        'O3': 1,
-        'CO': 2,
-        'SO2': 3,
-        'PM2.5': 5
-    }
+def station_detail(values, station_code):
+    index = keep_stations.index(station_code)
 
     results = {}
-    index = keep_stations.index(station_code)
     max_val = 0
     dominant_pollutant=""
-    for pollutant, idx in feature_idx.items():
-        values = prediction[0, :, idx].numpy()
-        values_2d = values.reshape(1, 13)
-        actual = scalers[pollutant].inverse_transform(values_2d)
-        res = actual.flatten()
-        if res[index] > max_val and pollutant != 'PM2.5':
-            max_val = res[index]
+    for pollutant in DETAIL_POLLUTANTS:
+        value = values[index, TARGET_COLS.index(pollutant)]
+        if value > max_val and pollutant != 'PM2.5':
+            max_val = value
             dominant_pollutant = pollutant
-        results[pollutant] = res[index]
+        results[pollutant] = value
 
-    last_time_step = df['Measurement date'].max()
+    return results['NO2'], results['O3'], results['CO'], results['SO2'], results['PM2.5'], dominant_pollutant
 
-    return results['NO2'], results['O3'], results['CO'], results['SO2'], results['PM2.5'], dominant_pollutant, last_time_step
+def predict(model, station_code, device='cpu'):
+    values, last_time_step = predict_all(model, device)
+    return station_prediction(values, station_code), last_time_step
 
-def predict_multistep(model, device='cpu', steps=6):
-    input_df = pd.read_csv('aqi_data.csv')
-    input_df['Measurement date'] = pd.to_datetime(input_df['Measurement date'])
+def predict_detail(model, station_code, device='cpu'):
+    values, last_time_step = predict_all(model, device)
+    return (*station_detail(values, station_code), last_time_step)
+
+def predict_multistep(model, device='cpu', steps=6, samples=0, feature_scalers=None, features=None):
+    # Starts from the same live, memoized (1, 24, 13, 10) window as the
+    # single-step path; `features` lets a caller pass in one it already holds.
+    scaler_bank = resolve_scaler_bank(feature_scalers)
+    if features is None:
+        features = _pipeline.features(get_data_version(), scaler_bank)
+    current_input, last_24_hours = features
+    current_input = current_input.to(device)
+    feature_cols = TARGET_COLS
+
+    if is_direct(model, steps):
+        predictions_storage, samples_storage = direct_forecast(model, current_input, last_24_hours, steps, samples)
+    else:
+        predictions_storage, samples_storage = rollout(model, current_input, last_24_hours, steps, device, samples=samples)
 
-    keep_stations = [101, 102, 105, 106, 107, 109, 111, 112, 113, 119, 120, 121, 122]
-    input_df = input_df[input_df['Station code'].isin(keep_stations)]
+    results_dict = {'Station Code': keep_stations}
 
-    timestamps = np.sort(input_df['Measurement date'].unique())
-    if len(timestamps) < 24:
-        raise ValueError(f"CSV only has {len(timestamps)} hours. Model requires 24h.")
+    for step_idx, raw_pred in enumerate(predictions_storage):
+        hour_label = f"{step_idx + 1}hr"
 
-    last_24_hours = timestamps[-24:]
-    input_df = input_df[input_df['Measurement date'].isin(last_24_hours)]
-    
-    last_known_time = pd.to_datetime(last_24_hours[-1])
-
-    time_df = pd.DataFrame({'Measurement date': last_24_hours})
-    time_df['hour'] = time_df['Measurement date'].dt.hour
-    time_df['month'] = time_df['Measurement date'].dt.month
-
-    time_feats = {}
-    time_feats['hour_sin'] = np.sin(2 * np.pi * time_df['hour'] / 24.0).values
-    time_feats['hour_cos'] = np.cos(2 * np.pi * time_df['hour'] / 24.0).values
-    time_feats['month_sin'] = np.sin(2 * np.pi * time_df['month'] / 12.0).values
-    time_feats['month_cos'] = np.cos(2 * np.pi * time_df['month'] / 12.0).values
-
-    feature_cols = ['NO2', 'O3', 'CO', 'SO2', 'PM10', 'PM2.5']
-    time_cols = ['hour_sin', 'hour_cos', 'month_sin', 'month_cos']
-
-    processed_features = []
-
-    for feat in feature_cols:
-        pivot = input_df.pivot_table(index='Measurement date', columns='Station code', values=feat)
-        pivot = pivot.reindex(columns=keep_stations)
-        pivot = pivot.interpolate(method='linear', limit_direction='both').bfill().ffill()
-        values = pivot.values
-        if feat in scalers:
-            values_norm = scalers[feat].transform(values)
-        else:
-            values_norm = values
-        processed_features.append(values_norm)
+        # (stations, targets) for the point forecast, (K, stations, targets) for the draws
+        pred_actual = scaler_bank.inverse_transform(raw_pred[0].cpu().numpy().astype(np.float64))
+        pred_actual = np.clip(pred_actual, a_min=0.0, a_max=None)
+        if samples_storage:
+            draws = scaler_bank.inverse_transform(samples_storage[step_idx][:, 0].cpu().numpy().astype(np.float64))
+            draws = np.clip(draws, a_min=0.0, a_max=None)
+            bands = {label: np.quantile(draws, q, axis=0) for label, q in UNCERTAINTY_QUANTILES.items()}
 
-    num_stations = len(keep_stations)
-    for t_col in time_cols:
-        t_val = time_feats[t_col].reshape(-1, 1)
-        t_block = np.tile(t_val, (1, num_stations))
-        processed_features.append(t_block)
+        for i, feat_name in enumerate(feature_cols):
+            col_name = f'Predicted {feat_name} ({hour_label})'
+            results_dict[col_name] = pred_actual[:, i]
+
+            if samples_storage:
+                for label, band in bands.items():
+                    results_dict[f'{col_name} {label}'] = band[:, i]
+
+    results = pd.DataFrame(results_dict)
+    if samples_storage:
+        # Rollout bands come from resampled trajectories and widen with the
+        # horizon; a direct model draws all horizons from one dropout head
+        # around a single trunk pass, so its bands understate later hours.
+        results.attrs['uncertainty'] = 'mc_dropout_head' if is_direct(model, steps) else 'mc_dropout_trajectory'
+    
+    return results
 
-    input_seq = np.stack(processed_features, axis=-1)
-    current_input = torch.FloatTensor(input_seq).unsqueeze(0).to(device)
+def time_row(timestamp, batch_size, num_stations, device='cpu'):
+    # (B, 1, N, 4) cyclical time features of one future hour
+    feats = [
+        np.sin(2 * np.pi * timestamp.hour / 24.0),
+        np.cos(2 * np.pi * timestamp.hour / 24.0),
+        np.sin(2 * np.pi * timestamp.month / 12.0),
+        np.cos(2 * np.pi * timestamp.month / 12.0),
+    ]
+    return expand_time_row(torch.FloatTensor(feats).view(1, 4).to(device).expand(batch_size, 4), num_stations)
+
+def expand_time_row(feats, num_stations):
+    # (B, 4) per-window time features -> (B, 1, N, 4) row to append
+    return feats.view(feats.size(0), 1, 1, -1).expand(-1, 1, num_stations, -1)
+
+def rollout_samples(model, current_input, timestamps, steps, samples, device='cpu'):
+    # K Monte-Carlo dropout trajectories: each sample's draw is fed back into
+    # its own input window, so the error compounds through the rollout and the
+    # bands widen with the horizon. The observed hours are shared by every
+    # trajectory, so they are embedded once (through the embedding cache) and
+    # run through the GRU at batch 1; only the fed-back rows are embedded and
+    # encoded per trajectory, continuing from that shared state. Returns
+    # per-step (K, 1, N, targets) draws.
+    if not isinstance(model, TGCN):
+        raise ValueError("Uncertainty sampling requires the eager torch backend.")
+    last_known_time = pd.to_datetime(timestamps)[-1]
+    num_stations = current_input.size(2)
+    seq_len = current_input.size(1)
+    samples_storage = []
+    with torch.no_grad():
+        observed = embed_cached(model, current_input, list(pd.to_datetime(timestamps)))
+        fed_back = []
+        for step in range(1, steps + 1):
+            shared = model.encode(observed[:, step - 1:]) if step - 1 < seq_len else None
+            if fed_back:
+                if shared is not None:
+                    shared = shared.repeat(samples, 1)
+                hidden = model.encode(torch.cat(fed_back[-seq_len:], dim=1), shared)
+                draws = model.sample_head(hidden, samples, num_stations, 1)[0]
+            else:
+                draws = model.sample_head(shared, 1, num_stations, samples)[:, 0]
+            samples_storage.append(draws.unsqueeze(1))
+            if step < steps:
+                next_time = last_known_time + pd.Timedelta(hours=step)
+                new_row = torch.cat([draws.unsqueeze(1), time_row(next_time, samples, num_stations, device)], dim=-1)
+                fed_back.append(model.embed(new_row))
+    return samples_storage
+
+def rollout(model, current_input, timestamps, steps=6, device='cpu', use_cache=True, samples=0):
+    # Autoregressive rollout: each prediction is fed back as the newest hour.
+    # With the embedding cache only that appended row goes through gc1.
+    # With samples > 0, K dropout trajectories are rolled out alongside the
+    # point forecast (see rollout_samples).
+    timestamps = list(pd.to_datetime(timestamps))
+    last_known_time = timestamps[-1]
+    num_stations = current_input.size(2)
 
     model.eval()
     predictions_storage = []
+    samples_storage = []
+    if samples:
+        samples_storage = rollout_samples(model, current_input, timestamps, steps, samples, device)
 
     with torch.no_grad():
         for step in range(1, steps + 1):
-            prediction = model(current_input) 
+            if use_cache:
+                prediction = forward_cached(model, current_input, timestamps)
+            else:
+                prediction = model(current_input)
             predictions_storage.append(prediction)
 
             if step < steps:
                 next_time = last_known_time + pd.Timedelta(hours=step)
-                
-                next_h = next_time.hour
-                next_m = next_time.month
-                
-                next_time_feats = [
-                    np.sin(2 * np.pi * next_h / 24.0),
-                    np.cos(2 * np.pi * next_h / 24.0),
-                    np.sin(2 * np.pi * next_m / 12.0),
-                    np.cos(2 * np.pi * next_m / 12.0)
-                ]
-                
-                next_time_tensor = torch.FloatTensor(next_time_feats).view(1, 1, 1, 4).to(device)
-                next_time_tensor = next_time_tensor.repeat(1, 1, num_stations, 1)
-
-                pred_unsqueezed = prediction.unsqueeze(1)
-                
-                new_row = torch.cat([pred_unsqueezed, next_time_tensor], dim=-1)
+                new_row = torch.cat([prediction.unsqueeze(1), time_row(next_time, 1, num_stations, device)], dim=-1)
 
                 current_input = torch.cat([current_input[:, 1:, :, :], new_row], dim=1)
+                timestamps = timestamps[1:] + [next_time]
 
-    results_dict = {'Station Code': keep_stations}
+    return predictions_storage, samples_storage
 
-    for step_idx, raw_pred in enumerate(predictions_storage):
-        hour_label = f"{step_idx + 1}hr"
-        
-        for i, feat_name in enumerate(feature_cols):
-            pred_norm = raw_pred[0, :, i].cpu().numpy().reshape(1, -1)
+def direct_forecast(model, current_input, timestamps, steps=6, samples=0):
+    # A direct multi-horizon model emits all steps from one forward pass;
+    # results come back in the same per-step layout as rollout().
+    timestamps = list(pd.to_datetime(timestamps))
+    model.eval()
 
-            if feat_name in scalers:
-                pred_actual = scalers[feat_name].inverse_transform(pred_norm)
-            else:
-                pred_actual = pred_norm
+    with torch.no_grad():
+        if samples:
+            prediction, draws = forward_with_samples(model, current_input, timestamps, samples, all_horizons=True)
+            samples_storage = [draws[:, :, :, h] for h in range(steps)]
+        else:
+            prediction = forward_horizons_cached(model, current_input, timestamps)
+            samples_storage = []
 
-            pred_actual = np.clip(pred_actual, a_min=0.0, a_max=None)
-            
-            col_name = f'Predicted {feat_name} ({hour_label})'
-            results_dict[col_name] = pred_actual.flatten()
+    predictions_storage = [prediction[:, :, h] for h in range(steps)]
+    return predictions_storage, samples_storage
 
-    results = pd.DataFrame(results_dict)
-    
-    return results
+def rollout_batch(model, x, future_time_feats):
+    # Autoregressive rollout over a batch of windows at once. future_time_feats
+    # is (B, steps, 4): the cyclical time features of the hours after each
+    # window. Returns (B, N, steps, targets).
+    B, T, N, F = x.shape
+    steps = future_time_feats.size(1)
+    predictions = []
+
+    model.eval()
+    with torch.no_grad():
+        for step in range(steps):
+            prediction = model(x)
+            predictions.append(prediction)
+            if step < steps - 1:
+                new_row = torch.cat([prediction.unsqueeze(1), expand_time_row(future_time_feats[:, step], N)], dim=-1)
+                x = torch.cat([x[:, 1:], new_row], dim=1)
+
+    return torch.stack(predictions, dim=2)
 
 def get_pm25_for_station(results_df, station_code):
     station_row = results_df[results_df['Station Code'] == station_code]
@@ -353,10 +465,17 @@ def get_pm25_for_station(results_df, station_code):
     hourly_forecast = []
     for i, (label, pm25) in enumerate(pm25_values, start=1):
         forecast_time = now + timedelta(hours=i)
-        hourly_forecast.append({
+        entry = {
             "time": forecast_time.strftime("%Y-%m-%d %H:%M"),
             "hour24": forecast_time.strftime("%H:%M"),
             "pm25": round(float(pm25), 2)
-        })
+        }
+        for q_label in UNCERTAINTY_QUANTILES:
+            col_name = f'Predicted PM2.5 ({label}) {q_label}'
+            if col_name in station_row:
+                entry[f"pm25_{q_label}"] = round(float(station_row[col_name].values[0]), 2)
+        if 'uncertainty' in results_df.attrs:
+            entry["uncertainty"] = results_df.attrs['uncertainty']
+        hourly_forecast.append(entry)
     
     return hourly_forecast
\ No newline at end of file
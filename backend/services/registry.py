@@ -0,0 +1,148 @@
+import os
+import re
+import threading
+
+import joblib
+import torch
+
+from services.inference import get_model, predict_torch, MODEL_DIR, MODEL_FILE, ADJ_MATRIX_FILE, SEQ_LEN, NUM_NODES, NUM_FEATURES
+from services.preprocessing import SCALERS_FILE, FEATURE_COLS
+from services.scaler_bank import as_scaler_bank
+
+VERSIONS_DIR = os.path.join(MODEL_DIR, 'versions')
+REQUIRED_FILES = (MODEL_FILE, SCALERS_FILE, ADJ_MATRIX_FILE)
+DEFAULT_VERSION = 'default'
+
+
+class ModelVersion:
+    def __init__(self, version, model, scalers, path):
+        self.version = version
+        self.model = model
+        self.scalers = scalers
+        self.path = path
+
+
+def warm_up(model, batch_size=1):
+    predict_torch(torch.zeros(batch_size, SEQ_LEN, NUM_NODES, NUM_FEATURES), model)
+
+
+def load_version(path, version):
+    model = get_model(model_dir=path)
+    scalers = as_scaler_bank(joblib.load(os.path.join(path, SCALERS_FILE)), FEATURE_COLS)
+    warm_up(model)
+    return ModelVersion(version, model, scalers, path)
+
+
+def version_key(name):
+    # Natural order, so v10 sorts after v9 and 2024-10-01 after 2024-9-30.
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+
+def version_signature(path):
+    # Changes whenever the directory or any required file is rewritten, so a
+    # version that failed while half-copied is retried once the copy lands.
+    stats = [os.stat(path)] + [os.stat(os.path.join(path, f)) for f in REQUIRED_FILES]
+    return tuple((st.st_mtime_ns, st.st_size) for st in stats)
+
+
+class ModelRegistry:
+    # Serves the newest complete checkpoint under versions_dir (one directory
+    # per version holding weights, scalers and adjacency, newest = last in
+    # natural version order). New versions are loaded and warmed up off the request path and
+    # swapped in with a single reference assignment, so in-flight requests
+    # finish on the version they started with.
+    def __init__(self, versions_dir=VERSIONS_DIR, default_dir=MODEL_DIR, poll_interval=60.0):
+        self.versions_dir = versions_dir
+        self.default_dir = default_dir
+        self.poll_interval = poll_interval
+        self._current = None
+        self._failed = {}
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_pid = None
+
+    def list_versions(self):
+        if not os.path.isdir(self.versions_dir):
+            return []
+        versions = []
+        for name in sorted(os.listdir(self.versions_dir), key=version_key):
+            path = os.path.join(self.versions_dir, name)
+            if os.path.isdir(path) and all(os.path.isfile(os.path.join(path, f)) for f in REQUIRED_FILES):
+                versions.append(name)
+        return versions
+
+    def _has_failed(self, version):
+        signature = self._failed.get(version)
+        if signature is None:
+            return False
+        try:
+            return version_signature(os.path.join(self.versions_dir, version)) == signature
+        except OSError:
+            return True
+
+    def _target(self):
+        versions = [v for v in self.list_versions() if not self._has_failed(v)]
+        if versions:
+            return versions[-1], os.path.join(self.versions_dir, versions[-1])
+        return DEFAULT_VERSION, self.default_dir
+
+    def refresh(self):
+        with self._load_lock:
+            version, path = self._target()
+            current = self._current
+            if current is not None and current.version == version:
+                return False
+
+            try:
+                loaded = load_version(path, version)
+            except Exception as e:
+                if current is None:
+                    raise
+                print(f"Failed to load model version {version}: {e}")
+                try:
+                    self._failed[version] = version_signature(path)
+                except OSError:
+                    pass
+                return False
+
+            self._current = loaded
+            print(f"Model version {version} is now serving.")
+            return True
+
+    def current(self):
+        if self._thread_pid is not None and self._thread_pid != os.getpid():
+            self.start()
+        current = self._current
+        if current is None:
+            self.refresh()
+            current = self._current
+        return current
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Model registry refresh failed: {e}")
+
+    def start(self):
+        # current() calls this again in a forked child: under gunicorn
+        # --preload the watcher started in the master does not survive fork,
+        # so each worker starts its own on first use, with fresh locks in
+        # case one was held at fork time.
+        pid = os.getpid()
+        if self._thread_pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        if self._thread_pid is not None and self._thread_pid != pid:
+            self._load_lock = threading.Lock()
+            self._stop = threading.Event()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+        self._thread_pid = pid
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
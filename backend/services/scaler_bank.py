@@ -0,0 +1,112 @@
+import numpy as np
+
+
+def affine_params(scaler):
+    # Every supported sklearn scaler is x * scale + offset per column.
+    name = type(scaler).__name__
+    if name == "MinMaxScaler":
+        return scaler.scale_, scaler.min_
+    if name == "StandardScaler":
+        # mean_ is fitted even with with_mean=False, so the flags decide
+        # what transform() actually applies.
+        ones = np.ones(scaler.n_features_in_)
+        scale = 1.0 / scaler.scale_ if scaler.with_std else ones
+        mean = scaler.mean_ if scaler.with_mean else 0.0
+        return scale, -mean * scale
+    if name == "MaxAbsScaler":
+        return 1.0 / scaler.scale_, np.zeros_like(scaler.scale_)
+    if name == "RobustScaler":
+        ones = np.ones(scaler.n_features_in_)
+        scale = 1.0 / scaler.scale_ if scaler.with_scaling else ones
+        center = scaler.center_ if scaler.with_centering else 0.0
+        return scale, -center * scale
+    raise ValueError(f"Unsupported scaler type for feature bank: {name}")
+
+
+class ScalerBank:
+    # The affine parameters of every per-feature sklearn scaler, stacked into
+    # (N, F) arrays once, so a whole (..., N, F) block is normalised or
+    # de-normalised with one NumPy broadcast instead of F sklearn calls.
+    def __init__(self, features, scale, offset, clip_low=None, clip_high=None):
+        self.features = list(features)
+        self.scale = scale
+        self.offset = offset
+        self.clip_low = clip_low
+        self.clip_high = clip_high
+
+    @classmethod
+    def from_scalers(cls, scalers, features, verify=True):
+        params = []
+        for feat in features:
+            if feat in scalers:
+                scale, offset = affine_params(scalers[feat])
+                params.append((np.asarray(scale, dtype=np.float64), np.asarray(offset, dtype=np.float64)))
+            else:
+                if 'sin' not in feat and 'cos' not in feat:
+                    print(f"Warning: Scaler for {feat} not found. Using raw values.")
+                params.append((np.ones(1), np.zeros(1)))
+
+        num_nodes = max(scale.size for scale, _ in params)
+        scale = np.ones((num_nodes, len(features)))
+        offset = np.zeros((num_nodes, len(features)))
+        clip_low = np.full((num_nodes, len(features)), -np.inf)
+        clip_high = np.full((num_nodes, len(features)), np.inf)
+        for i, (feat, (a, b)) in enumerate(zip(features, params)):
+            if a.size not in (1, num_nodes):
+                raise ValueError(f"Scaler for {feat} has {a.size} columns; expected 1 or {num_nodes}.")
+            scale[:, i] = a
+            offset[:, i] = b
+            scaler = scalers.get(feat)
+            if getattr(scaler, "clip", False):
+                clip_low[:, i], clip_high[:, i] = scaler.feature_range
+
+        has_clip = np.isfinite(clip_low).any() or np.isfinite(clip_high).any()
+        bank = cls(features, scale, offset, clip_low if has_clip else None, clip_high if has_clip else None)
+        if verify:
+            bank.verify(scalers)
+        return bank
+
+    def transform(self, block):
+        # (..., N, F) raw features -> normalised, float64
+        out = block * self.scale + self.offset
+        if self.clip_low is not None:
+            out = np.clip(out, self.clip_low, self.clip_high)
+        return out
+
+    def inverse_transform(self, values):
+        # (..., N, k) normalised values of the first k features -> raw units
+        k = values.shape[-1]
+        return (values - self.offset[:, :k]) / self.scale[:, :k]
+
+    def verify(self, scalers, rows=64, rtol=1e-6, atol=1e-9):
+        # Parity with the sklearn objects the bank was built from.
+        rng = np.random.default_rng(0)
+        num_nodes, num_features = self.scale.shape
+        for i, feat in enumerate(self.features):
+            if feat not in scalers:
+                continue
+            scaler = scalers[feat]
+
+            def sklearn(fn, values):
+                # Per-station scalers see (rows, N); a single-column scaler sees one long column.
+                if getattr(scaler, "n_features_in_", num_nodes) == 1:
+                    return fn(values.reshape(-1, 1)).reshape(values.shape)
+                return fn(values)
+
+            raw = rng.uniform(0.0, 200.0, size=(rows, num_nodes))
+            block = np.zeros((rows, num_nodes, num_features))
+            block[..., i] = raw
+            expected = sklearn(scaler.transform, raw)
+            if not np.allclose(self.transform(block)[..., i], expected, rtol=rtol, atol=atol):
+                raise ValueError(f"Scaler bank transform for {feat} does not match sklearn.")
+
+            norm = np.zeros((rows, num_nodes, num_features))
+            norm[..., i] = expected
+            if not np.allclose(self.inverse_transform(norm)[..., i], sklearn(scaler.inverse_transform, expected), rtol=rtol, atol=atol):
+                raise ValueError(f"Scaler bank inverse_transform for {feat} does not match sklearn.")
+
+
+def as_scaler_bank(scalers, features):
+    if isinstance(scalers, ScalerBank):
+        return scalers
+    return ScalerBank.from_scalers(scalers, features)
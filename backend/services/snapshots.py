@@ -0,0 +1,106 @@
+import glob
+import os
+import queue
+import threading
+
+import pandas as pd
+
+from services.config import BASE_DIR
+
+SNAPSHOT_DIR = os.path.join(BASE_DIR, 'snapshots')
+LATEST_SNAPSHOT_PATH = os.path.join(BASE_DIR, 'aqi_data_sorted.parquet')
+SNAPSHOT_PATTERN = 'aqi_*.parquet'
+DEFAULT_RETENTION = 48
+
+
+def write_atomic(df, path):
+    # Readers (the Streamlit apps) only ever see a complete file: the
+    # snapshot is written next to its target and renamed over it.
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    df.to_parquet(tmp_path, index=False, compression="zstd")
+    os.replace(tmp_path, path)
+
+
+class SnapshotExporter:
+    # Writes one Parquet snapshot per data hour off the request path: submit()
+    # only enqueues, a daemon thread does the I/O, keeps the newest
+    # `retention` hourly files and refreshes the stable latest-snapshot path.
+    def __init__(self, directory=SNAPSHOT_DIR, latest_path=LATEST_SNAPSHOT_PATH, retention=DEFAULT_RETENTION):
+        self.directory = directory
+        self.latest_path = latest_path
+        self.retention = retention
+        self._last = None
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        # Started on first use, so each forked gunicorn worker gets its own thread.
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="snapshot-exporter", daemon=True)
+                self._thread.start()
+
+    def submit(self, df, hour):
+        # Enqueues a copy of df for `hour` (a Timestamp). A later, more
+        # complete frame for the same hour is exported again; identical
+        # frames and older hours are ignored.
+        digest = int(pd.util.hash_pandas_object(df, index=False).sum())
+        with self._lock:
+            if self._last is not None:
+                last_hour, last_digest = self._last
+                if hour < last_hour or (hour == last_hour and digest == last_digest):
+                    return False
+            self._last = (hour, digest)
+        self.start()
+        self._queue.put((df.copy(), hour))
+        return True
+
+    def _run(self):
+        while True:
+            df, hour = self._queue.get()
+            try:
+                self.export(df, hour)
+            except Exception as e:
+                print(f"Snapshot export failed for {hour}: {e}")
+
+    def export(self, df, hour):
+        df['Measurement date'] = pd.to_datetime(df['Measurement date'])
+        df = df.sort_values(by=['Measurement date', 'Station code'])
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"aqi_{hour:%Y%m%d%H}.parquet")
+        write_atomic(df, path)
+        # Every gunicorn worker runs its own exporter; one that is behind
+        # must not roll the shared latest snapshot back to an older hour.
+        snapshots = self.snapshots()
+        if not snapshots or snapshots[-1] <= path:
+            write_atomic(df, self.latest_path)
+        self.prune()
+        return path
+
+    def snapshots(self):
+        return sorted(glob.glob(os.path.join(self.directory, SNAPSHOT_PATTERN)))
+
+    def prune(self):
+        snapshots = self.snapshots()
+        for path in snapshots[:max(len(snapshots) - self.retention, 0)]:
+            # Another worker may have pruned the same file already.
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter():
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = SnapshotExporter(
+                directory=os.getenv("SNAPSHOT_DIR", SNAPSHOT_DIR),
+                retention=int(os.getenv("SNAPSHOT_RETENTION", DEFAULT_RETENTION)),
+            )
+        return _exporter
@@ -0,0 +1,17 @@
+station_code_map = {
+    "Jongno-gu": 101,
+    "Jung-gu": 102,
+    "Seodaemun-gu": 105,
+    "Mapo-gu": 106,
+    "Seongdong-gu": 107,
+    "Dongdaemun-gu": 109,
+    "Seongbuk-gu": 111,
+    "Gangbuk-gu": 112,
+    "Dobong-gu": 113,
+    "Yeongdeungpo-gu": 119,
+    "Dongjak-gu": 120,
+    "Gwanak-gu": 121,
+    "Seocho-gu": 122,
+}
+
+keep_stations = [101, 102, 105, 106, 107, 109, 111, 112, 113, 119, 120, 121, 122]
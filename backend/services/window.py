@@ -0,0 +1,118 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from services.preprocessing import fetch_records, hours_before, TARGET_COLS
+from services.stations import keep_stations
+
+HOUR = np.timedelta64(1, 'h')
+OVERLAP_HOURS = 2
+# New documents land once an hour, so re-checking Mongo at most once a
+# minute keeps the steady state query-free without serving a stale hour.
+DEFAULT_REFRESH_INTERVAL = 60.0
+
+
+class WindowBuffer:
+    # Resident ring buffer of the last `hours` hours as a (W, stations,
+    # pollutants) array. refresh() only asks Mongo for the last `overlap`
+    # hours before the newest document held plus anything newer, so the
+    # steady state is one small query instead of re-reading 312 documents
+    # per request. The overlap picks up stations that are inserted one at a
+    # time, or that repeat an hour the buffer already holds.
+    def __init__(self, hours=24, stations=keep_stations, min_interval=DEFAULT_REFRESH_INTERVAL, overlap=OVERLAP_HOURS):
+        self.hours = hours
+        self.stations = list(stations)
+        self.min_interval = min_interval
+        self.overlap = overlap
+        self.latest = None
+        self._station_index = pd.Index(self.stations)
+        self._values = np.full((hours, len(self.stations), len(TARGET_COLS)), np.nan)
+        self._end = None
+        self._head = hours - 1
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        # Returns the number of station-hour slots that changed (0 when the
+        # window is unchanged). With min_interval > 0, calls within that many
+        # seconds of the last check skip the query.
+        with self._lock:
+            now = time.monotonic()
+            if self.latest is not None and now - self._checked < self.min_interval:
+                return 0
+            self._checked = now
+            since = None if self.latest is None else hours_before(self.latest, self.overlap)
+            df = fetch_records(self.hours, since=since)
+            if df.empty:
+                return 0
+            changed = self._apply(df)
+            self.latest = max(df['Measurement date'].max(), self.latest or '')
+            return changed
+
+    def _advance(self, end):
+        if self._end is None:
+            self._end = end
+            return 0
+        delta = int((end - self._end) / HOUR)
+        if delta <= 0:
+            return 0
+        if delta >= self.hours:
+            self._values[:] = np.nan
+        else:
+            slots = (self._head + 1 + np.arange(delta)) % self.hours
+            self._values[slots] = np.nan
+        self._head = (self._head + delta) % self.hours
+        self._end = end
+        return delta
+
+    def _apply(self, df):
+        # Overwrites slots idempotently, so re-fetched overlap rows are
+        # harmless; returns how many slots changed (an advance counts as one).
+        times = pd.to_datetime(df['Measurement date']).to_numpy().astype('datetime64[h]')
+        advanced = self._advance(times.max())
+
+        offsets = ((self._end - times) / HOUR).astype(np.int64)
+        stations = self._station_index.get_indexer(df['Station code'])
+        keep = (offsets >= 0) & (offsets < self.hours) & (stations >= 0)
+        slots = (self._head - offsets[keep]) % self.hours
+        stations = stations[keep]
+
+        before = self._values[slots, stations]
+        after = df[TARGET_COLS].to_numpy(dtype=np.float64)[keep]
+        self._values[slots, stations] = after
+        same = (before == after) | (np.isnan(before) & np.isnan(after))
+        return int(advanced > 0) + int((~same.all(axis=-1)).sum())
+
+    def hours_index(self):
+        if self._end is None:
+            return pd.DatetimeIndex([])
+        return pd.DatetimeIndex(self._end - np.arange(self.hours)[::-1] * HOUR)
+
+    def array(self):
+        # Oldest-first copy of the window; missing station-hours are NaN.
+        return self.snapshot()[0]
+
+    def snapshot(self):
+        # -> (oldest-first (W, stations, pollutants) copy, hours), taken
+        # under one lock so the two always describe the same window. This is
+        # what the serving path builds its input tensor from.
+        with self._lock:
+            return np.roll(self._values, -(self._head + 1), axis=0), self.hours_index()
+
+    def frame(self):
+        # The window in get_df_data's long layout (for snapshot export);
+        # missing station-hours are left out.
+        values, times = self.snapshot()
+        return window_frame(values, times, self.stations)
+
+
+def window_frame(values, times, stations):
+    if len(times) == 0:
+        raise ValueError("Window buffer is empty. Check Database connection.")
+    W, N, P = values.shape
+    df = pd.DataFrame(values.reshape(W * N, P), columns=TARGET_COLS)
+    df.insert(0, 'Measurement date', np.repeat(times.strftime('%Y-%m-%d %H:%M:%S'), N))
+    df.insert(0, 'Station code', np.tile(stations, W))
+    return df[df[TARGET_COLS].notna().all(axis=1)].reset_index(drop=True)
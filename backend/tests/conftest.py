@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+import torch
+
+# The services package is imported as "services.*" from backend/, as main.py does.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.inference import TGCN, NUM_NODES, NUM_FEATURES, TARGET_DIM
+
+
+def random_adjacency(num_nodes=NUM_NODES, density=0.3, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    adj = (torch.rand(num_nodes, num_nodes, generator=generator) < density).float()
+    adj = adj + torch.eye(num_nodes)
+    return adj / adj.sum(dim=1, keepdim=True)
+
+
+def random_tgcn(seed=0, **kwargs):
+    torch.manual_seed(seed)
+    model = TGCN(NUM_NODES, NUM_FEATURES, 32, TARGET_DIM, random_adjacency(seed=seed), 0.1, **kwargs)
+    return model.eval()
+
+
+@pytest.fixture
+def adjacency():
+    return random_adjacency()
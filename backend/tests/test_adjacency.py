@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from services.adjacency import adjacency_cache_key
+
+STATIONS = [101, 102, 103]
+COORDS = np.array([[37.57, 126.98], [37.54, 127.05], [37.50, 126.90]])
+
+
+def test_cache_key_resolves_defaults():
+    assert adjacency_cache_key(STATIONS, COORDS, {}) == adjacency_cache_key(STATIONS, COORDS, {"method": "gaussian", "normalize": "row"})
+
+
+def test_cache_key_ignores_chunk_size():
+    assert adjacency_cache_key(STATIONS, COORDS, {}) == adjacency_cache_key(STATIONS, COORDS, {"chunk_rows": 2})
+
+
+def test_cache_key_tracks_parameters_and_coordinates():
+    base = adjacency_cache_key(STATIONS, COORDS, {})
+    assert adjacency_cache_key(STATIONS, COORDS, {"threshold": 0.5}) != base
+    assert adjacency_cache_key(STATIONS, COORDS, {"metric": "euclidean"}) != base
+    assert adjacency_cache_key(STATIONS, COORDS + 0.01, {}) != base
+
+
+def test_cache_key_rejects_unknown_parameters():
+    with pytest.raises(TypeError):
+        adjacency_cache_key(STATIONS, COORDS, {"sigma": 1.0})
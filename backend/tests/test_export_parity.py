@@ -0,0 +1,33 @@
+import pytest
+import torch
+
+from services.inference import export_torchscript, SEQ_LEN, NUM_NODES, NUM_FEATURES
+from conftest import random_tgcn
+
+
+@pytest.mark.parametrize("batch_size", [1, 7])
+def test_torchscript_matches_eager(tmp_path, batch_size):
+    model = random_tgcn()
+    path = str(tmp_path / "model_scripted.pt")
+    export_torchscript(model, path)
+    loaded = torch.jit.load(path)
+
+    x = torch.rand(batch_size, SEQ_LEN, NUM_NODES, NUM_FEATURES)
+    with torch.no_grad():
+        torch.testing.assert_close(loaded(x), model(x), rtol=1e-5, atol=1e-5)
+
+
+@pytest.mark.parametrize("batch_size", [1, 7])
+def test_onnx_matches_eager(tmp_path, batch_size):
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    from services.onnx_backend import export_onnx, OnnxModel
+
+    model = random_tgcn()
+    path = str(tmp_path / "model.onnx")
+    export_onnx(model, path)
+    onnx_model = OnnxModel(path, num_threads=1)
+
+    x = torch.rand(batch_size, SEQ_LEN, NUM_NODES, NUM_FEATURES)
+    with torch.no_grad():
+        torch.testing.assert_close(onnx_model(x), model(x), rtol=1e-4, atol=1e-5)
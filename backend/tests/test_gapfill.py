@@ -0,0 +1,95 @@
+import warnings
+
+import numpy as np
+
+from services.gapfill import HOUR, build_window, interpolate_time, neighbour_fill, scatter_records
+
+STATIONS = [101, 102, 103]
+START = np.datetime64('2024-03-01T00', 'h')
+
+
+def records(rows):
+    # [(hour offset, station, value)] -> hours, codes, (R, 1) values
+    hours = np.array([START + h * HOUR for h, _, _ in rows])
+    codes = np.array([code for _, code, _ in rows])
+    values = np.array([[value] for _, _, value in rows], dtype=np.float64)
+    return hours, codes, values
+
+
+def test_duplicates_are_averaged():
+    hours, codes, values = records([(0, 101, 1.0), (0, 101, 3.0), (0, 102, 5.0)])
+    block, observed = scatter_records(hours, codes, values, STATIONS, START, 2)
+    assert block[0, 0, 0] == 2.0
+    assert block[0, 1, 0] == 5.0
+    assert np.isnan(block[1]).all()
+
+
+def test_unknown_stations_and_out_of_range_hours_are_dropped():
+    hours, codes, values = records([(0, 999, 1.0), (5, 101, 2.0), (-1, 101, 3.0), (1, 103, 4.0)])
+    block, observed = scatter_records(hours, codes, values, STATIONS, START, 2)
+    assert observed.tolist() == [[False, False, False], [False, False, True]]
+    assert block[1, 2, 0] == 4.0
+    assert np.isnan(block).sum() == 5
+
+
+def test_observed_mask_needs_every_pollutant():
+    hours = np.array([START, START])
+    codes = np.array([101, 102])
+    values = np.array([[1.0, 2.0], [3.0, np.nan]])
+    _, observed = scatter_records(hours, codes, values, STATIONS, START, 1)
+    assert observed.tolist() == [[True, False, False]]
+
+
+def test_missing_hour_is_interpolated_and_edges_held():
+    block = np.array([np.nan, 1.0, np.nan, np.nan, 4.0, np.nan])[:, None]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        filled = interpolate_time(block)
+    np.testing.assert_allclose(filled[:, 0], [1.0, 1.0, 2.0, 3.0, 4.0, 4.0])
+
+
+def test_all_missing_series_stays_nan():
+    block = np.full((4, 2), np.nan)
+    block[:, 1] = [1.0, np.nan, 3.0, 3.0]
+    filled = interpolate_time(block)
+    assert np.isnan(filled[:, 0]).all()
+    np.testing.assert_allclose(filled[:, 1], [1.0, 2.0, 3.0, 3.0])
+
+
+def test_station_without_readings_takes_neighbour_mean():
+    block = np.array([[[2.0], [4.0], [np.nan]]])
+    adj = np.array([
+        [1.0, 0.5, 0.0],
+        [0.5, 1.0, 0.5],
+        [1.0, 3.0, 1.0],
+    ])
+    filled = neighbour_fill(block, adj)
+    np.testing.assert_allclose(filled[0, :, 0], [2.0, 4.0, (1.0 * 2.0 + 3.0 * 4.0) / 4.0])
+
+
+def test_build_window_fills_gaps_and_reports_observed():
+    # 101 misses hour 1, 102 repeats hour 2, 103 never reports.
+    hours, codes, values = records([
+        (0, 101, 1.0), (2, 101, 3.0),
+        (0, 102, 10.0), (1, 102, 20.0), (2, 102, 30.0), (2, 102, 32.0),
+    ])
+    adj = np.array([
+        [1.0, 0.0, 0.0],
+        [0.0, 1.0, 0.0],
+        [1.0, 1.0, 1.0],
+    ])
+    block, window_hours, observed = build_window(hours, codes, values, STATIONS, 3, adj=adj)
+    assert block.shape == (3, 3, 1)
+    assert window_hours[0] == START and window_hours[-1] == START + 2 * HOUR
+    assert observed.tolist() == [[True, True, False], [False, True, False], [True, True, False]]
+    np.testing.assert_allclose(block[:, 0, 0], [1.0, 2.0, 3.0])
+    np.testing.assert_allclose(block[:, 1, 0], [10.0, 20.0, 31.0])
+    np.testing.assert_allclose(block[:, 2, 0], [5.5, 11.0, 17.0])
+
+
+def test_build_window_keeps_shape_when_newest_hours_are_missing():
+    hours, codes, values = records([(0, 101, 1.0), (0, 102, 2.0), (0, 103, 3.0)])
+    block, window_hours, observed = build_window(hours, codes, values, STATIONS, 4, end=START + 2 * HOUR)
+    assert block.shape == (4, 3, 1)
+    assert observed[1].all() and not observed[[0, 2, 3]].any()
+    np.testing.assert_allclose(block[:, :, 0], np.tile([1.0, 2.0, 3.0], (4, 1)))
@@ -0,0 +1,43 @@
+import pandas as pd
+import torch
+
+from services.inference import SEQ_LEN, NUM_NODES, NUM_FEATURES
+from services.preprocessing import rollout, rollout_samples
+from conftest import random_tgcn
+
+
+def window(seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    x = torch.rand(1, SEQ_LEN, NUM_NODES, NUM_FEATURES, generator=generator)
+    return x, pd.date_range("2024-03-01", periods=SEQ_LEN, freq="h")
+
+
+def test_encode_continues_from_state():
+    model = random_tgcn()
+    emb = model.embed(torch.rand(2, SEQ_LEN, NUM_NODES, NUM_FEATURES))
+    with torch.no_grad():
+        state = model.encode(emb[:, :16])
+        torch.testing.assert_close(model.encode(emb[:, 16:], state), model.encode(emb), rtol=1e-5, atol=1e-6)
+
+
+def test_trajectories_without_dropout_match_point_rollout():
+    # With p=0 every trajectory is the point forecast, so the shared-prefix
+    # encoding has to reproduce the full-window rollout step for step.
+    model = random_tgcn()
+    model.dropout.p = 0.0
+    x, timestamps = window()
+    points, _ = rollout(model, x, timestamps, steps=6, use_cache=False)
+    draws = rollout_samples(model, x, timestamps, steps=6, samples=4)
+    assert len(draws) == 6
+    for point, step_draws in zip(points, draws):
+        assert step_draws.shape == (4, 1, NUM_NODES, point.size(-1))
+        torch.testing.assert_close(step_draws, point.expand_as(step_draws), rtol=1e-4, atol=1e-5)
+
+
+def test_trajectories_spread_with_dropout():
+    model = random_tgcn()
+    model.dropout.p = 0.5
+    x, timestamps = window()
+    torch.manual_seed(0)
+    draws = rollout_samples(model, x, timestamps, steps=3, samples=16)
+    assert all(float(step.std(dim=0).max()) > 0 for step in draws)
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+sklearn_preprocessing = pytest.importorskip("sklearn.preprocessing")
+
+from services.scaler_bank import ScalerBank
+
+NUM_NODES = 13
+FEATURES = ['NO2', 'O3', 'PM2.5', 'hour_sin']
+SCALERS = ["MinMaxScaler", "StandardScaler", "MaxAbsScaler", "RobustScaler"]
+
+
+def fitted_scalers(name, seed=0, **options):
+    rng = np.random.default_rng(seed)
+    scalers = {}
+    for feat in FEATURES[:-1]:
+        scaler = getattr(sklearn_preprocessing, name)(**options)
+        scaler.fit(rng.gamma(2.0, 20.0, size=(500, NUM_NODES)))
+        scalers[feat] = scaler
+    return scalers
+
+
+@pytest.mark.parametrize("name", SCALERS)
+def test_transform_matches_sklearn(name):
+    scalers = fitted_scalers(name)
+    bank = ScalerBank.from_scalers(scalers, FEATURES, verify=False)
+    block = np.random.default_rng(1).uniform(0.0, 150.0, size=(24, NUM_NODES, len(FEATURES)))
+
+    out = bank.transform(block)
+    for i, feat in enumerate(FEATURES[:-1]):
+        np.testing.assert_allclose(out[..., i], scalers[feat].transform(block[..., i]), rtol=1e-9, atol=1e-12)
+    # Features without a scaler (the cyclical time columns) pass through.
+    np.testing.assert_array_equal(out[..., -1], block[..., -1])
+
+
+@pytest.mark.parametrize("name", SCALERS)
+def test_inverse_transform_matches_sklearn(name):
+    scalers = fitted_scalers(name)
+    bank = ScalerBank.from_scalers(scalers, FEATURES, verify=False)
+    targets = len(FEATURES) - 1
+    values = np.random.default_rng(2).uniform(0.0, 1.0, size=(6, NUM_NODES, targets))
+
+    out = bank.inverse_transform(values)
+    for i, feat in enumerate(FEATURES[:-1]):
+        np.testing.assert_allclose(out[..., i], scalers[feat].inverse_transform(values[..., i]), rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("name, options", [
+    ("StandardScaler", {"with_mean": False}),
+    ("StandardScaler", {"with_std": False}),
+    ("RobustScaler", {"with_centering": False}),
+    ("RobustScaler", {"with_scaling": False}),
+])
+def test_partial_scalers_match_sklearn(name, options):
+    scalers = fitted_scalers(name, **options)
+    bank = ScalerBank.from_scalers(scalers, FEATURES)
+    block = np.random.default_rng(4).uniform(0.0, 150.0, size=(24, NUM_NODES, len(FEATURES)))
+
+    out = bank.transform(block)
+    for i, feat in enumerate(FEATURES[:-1]):
+        np.testing.assert_allclose(out[..., i], scalers[feat].transform(block[..., i]), rtol=1e-9, atol=1e-12)
+
+
+def test_clipping_minmax_matches_sklearn():
+    scalers = {}
+    rng = np.random.default_rng(3)
+    for feat in FEATURES[:-1]:
+        scalers[feat] = sklearn_preprocessing.MinMaxScaler(clip=True).fit(rng.uniform(0, 50, size=(100, NUM_NODES)))
+    bank = ScalerBank.from_scalers(scalers, FEATURES, verify=False)
+    block = rng.uniform(-20.0, 80.0, size=(24, NUM_NODES, len(FEATURES)))
+
+    out = bank.transform(block)
+    for i, feat in enumerate(FEATURES[:-1]):
+        np.testing.assert_allclose(out[..., i], scalers[feat].transform(block[..., i]), rtol=1e-9, atol=1e-12)
+
+
+def test_verify_rejects_mismatched_bank():
+    scalers = fitted_scalers("MinMaxScaler")
+    bank = ScalerBank.from_scalers(scalers, FEATURES, verify=False)
+    bank.scale[:, 0] *= 1.01
+    with pytest.raises(ValueError):
+        bank.verify(scalers)
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import services.window as window_module
+from services.preprocessing import TARGET_COLS, hours_before
+from services.window import WindowBuffer
+
+STATIONS = [1, 2]
+
+
+def stamp(hour):
+    return (pd.Timestamp('2024-03-01') + pd.Timedelta(hours=hour)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class FakeCollection:
+    # Stands in for fetch_records: returns every stored row measured after
+    # `since`, and records each query.
+    def __init__(self):
+        self.rows = []
+        self.queries = []
+
+    def add(self, hour, station, value=None):
+        value = hour * 10 + station if value is None else value
+        self.rows.append({'Station code': station, 'Measurement date': stamp(hour), **{col: value for col in TARGET_COLS}})
+
+    def add_hours(self, hours, stations=STATIONS):
+        for hour in hours:
+            for station in stations:
+                self.add(hour, station)
+
+    def __call__(self, hours, since=None):
+        self.queries.append(since)
+        rows = [row for row in self.rows if since is None or row['Measurement date'] > since]
+        return pd.DataFrame(rows, columns=['Station code', 'Measurement date', *TARGET_COLS])
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    fake = FakeCollection()
+    monkeypatch.setattr(window_module, 'fetch_records', fake)
+    return fake
+
+
+def buffer(**kwargs):
+    return WindowBuffer(hours=4, stations=STATIONS, min_interval=kwargs.pop('min_interval', 0.0), **kwargs)
+
+
+def station_series(window, station):
+    return window.array()[:, STATIONS.index(station), 0]
+
+
+def test_first_refresh_fills_the_window(mongo):
+    mongo.add_hours(range(4))
+    window = buffer()
+    assert window.refresh() == 8
+    assert mongo.queries == [None]
+    assert window.latest == stamp(3)
+    np.testing.assert_array_equal(station_series(window, 1), [1, 11, 21, 31])
+    assert window.hours_index()[-1] == pd.Timestamp(stamp(3))
+
+
+def test_unchanged_refresh_reports_nothing(mongo):
+    mongo.add_hours(range(4))
+    window = buffer()
+    window.refresh()
+    assert window.refresh() == 0
+    assert mongo.queries[-1] == hours_before(stamp(3), window.overlap)
+
+
+def test_new_hour_advances_the_ring(mongo):
+    mongo.add_hours(range(4))
+    window = buffer()
+    window.refresh()
+    mongo.add_hours([4])
+    # One for the advance, one per new station-hour; re-read overlap rows
+    # are unchanged.
+    assert window.refresh() == 3
+    assert window.latest == stamp(4)
+    np.testing.assert_array_equal(station_series(window, 2), [12, 22, 32, 42])
+    assert window.hours_index()[0] == pd.Timestamp(stamp(1))
+
+
+def test_skipped_hours_are_left_missing(mongo):
+    mongo.add_hours(range(4))
+    window = buffer()
+    window.refresh()
+    mongo.add_hours([5])
+    window.refresh()
+    np.testing.assert_array_equal(station_series(window, 1), [21, 31, np.nan, 51])
+
+
+@pytest.mark.parametrize('gap', [4, 24])
+def test_gap_of_a_full_window_clears_the_ring(mongo, gap):
+    mongo.add_hours(range(4))
+    window = buffer()
+    window.refresh()
+    mongo.add_hours([3 + gap])
+    assert window.refresh() == 3
+    values = window.array()
+    assert np.isnan(values[:-1]).all()
+    np.testing.assert_array_equal(values[-1, :, 0], [(3 + gap) * 10 + 1, (3 + gap) * 10 + 2])
+    assert window.hours_index()[0] == pd.Timestamp(stamp(gap))
+
+
+def test_late_station_backfills_a_held_hour(mongo):
+    mongo.add_hours(range(4), stations=[1])
+    mongo.add_hours(range(3), stations=[2])
+    window = buffer()
+    window.refresh()
+    assert np.isnan(station_series(window, 2)[-1])
+
+    mongo.add(3, 2)
+    assert window.refresh() == 1
+    assert window.latest == stamp(3)
+    np.testing.assert_array_equal(station_series(window, 2), [2, 12, 22, 32])
+
+
+def test_corrected_value_for_a_held_hour_is_applied(mongo):
+    mongo.add_hours(range(4))
+    window = buffer()
+    window.refresh()
+    mongo.rows = [row for row in mongo.rows if not (row['Station code'] == 1 and row['Measurement date'] == stamp(3))]
+    mongo.add(3, 1, value=99)
+    assert window.refresh() == 1
+    assert station_series(window, 1)[-1] == 99
+
+
+def test_min_interval_skips_the_query(mongo):
+    mongo.add_hours(range(4))
+    window = buffer(min_interval=60.0)
+    window.refresh()
+    mongo.add_hours([4])
+    assert window.refresh() == 0
+    assert len(mongo.queries) == 1
+    assert window.latest == stamp(3)
+
+
+def test_snapshot_and_frame_describe_the_same_window(mongo):
+    mongo.add_hours(range(4), stations=[1])
+    mongo.add_hours([1, 2, 3], stations=[2])
+    window = buffer()
+    window.refresh()
+    values, times = window.snapshot()
+    assert values.shape == (4, 2, len(TARGET_COLS))
+    assert len(times) == 4
+    frame = window.frame()
+    assert len(frame) == 7
+    assert frame['Measurement date'].iloc[-1] == stamp(3)
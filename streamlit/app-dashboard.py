@@ -8,6 +8,7 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
 import warnings
+from aqi_snapshot import read_aqi_snapshot
 warnings.filterwarnings('ignore')
 
 # Set page configuration
@@ -64,7 +65,7 @@ st.markdown("""
 @st.cache_data
 def load_data():
     # Load AQI data
-    aqi_data = pd.read_csv('../backend/aqi_data_sorted.csv')
+    aqi_data = read_aqi_snapshot()
     aqi_data['Measurement date'] = pd.to_datetime(aqi_data['Measurement date'])
     aqi_data['Hour'] = aqi_data['Measurement date'].dt.hour
     aqi_data['Date'] = aqi_data['Measurement date'].dt.date
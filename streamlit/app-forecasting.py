@@ -8,6 +8,7 @@ import requests
 import json
 from datetime import datetime, timedelta
 import warnings
+from aqi_snapshot import read_aqi_snapshot
 warnings.filterwarnings('ignore')
 
 # Set page configuration
@@ -135,7 +136,7 @@ STATIONS = {
 def load_static_data():
     """Load static CSV data for historical analysis"""
     try:
-        aqi_data = pd.read_csv('../backend/aqi_data_sorted.csv')
+        aqi_data = read_aqi_snapshot()
         aqi_data['Measurement date'] = pd.to_datetime(aqi_data['Measurement date'])
         aqi_data['Hour'] = aqi_data['Measurement date'].dt.hour
         aqi_data['Date'] = aqi_data['Measurement date'].dt.date
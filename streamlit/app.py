@@ -7,6 +7,7 @@ from plotly.subplots import make_subplots
 import requests
 from datetime import datetime, timedelta
 import warnings
+from aqi_snapshot import read_aqi_snapshot
 warnings.filterwarnings('ignore')
 
 # Set page configuration
@@ -289,7 +290,7 @@ if 'page' not in st.session_state:
 def load_static_data():
     """Load static CSV data for historical analysis"""
     try:
-        aqi_data = pd.read_csv('../backend/aqi_data_sorted.csv')
+        aqi_data = read_aqi_snapshot()
         aqi_data['Measurement date'] = pd.to_datetime(aqi_data['Measurement date'])
         aqi_data['Hour'] = aqi_data['Measurement date'].dt.hour
         aqi_data['Date'] = aqi_data['Measurement date'].dt.date
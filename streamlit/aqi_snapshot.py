@@ -0,0 +1,13 @@
+import os
+
+import pandas as pd
+
+SNAPSHOT_PATH = '../backend/aqi_data_sorted.parquet'
+LEGACY_CSV_PATH = '../backend/aqi_data_sorted.csv'
+
+
+def read_aqi_snapshot():
+    """Latest hourly Parquet snapshot from the backend, memory-mapped"""
+    if os.path.exists(SNAPSHOT_PATH):
+        return pd.read_parquet(SNAPSHOT_PATH, memory_map=True)
+    return pd.read_csv(LEGACY_CSV_PATH)